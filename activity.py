@@ -0,0 +1,92 @@
+import numpy as np
+
+# в этой полосе вокруг экрана всё обновляется каждый тик
+ACTIVE_MARGIN = 512
+# дальше, до этой границы, объекты обновляются раз в DROWSY_INTERVAL тиков, ещё дальше спят
+SLEEP_MARGIN = 1536
+DROWSY_INTERVAL = 4
+# сколько тиков не засыпает тот, кого задели
+WAKE_TICKS = 120
+# запас на размер ловушек: враг у границы сна ещё может попасть в дремлющую ловушку
+INDEX_MARGIN = 256
+
+
+class ActivityScheduler:
+    # решает, кого обновлять в этом тике, чтобы стоимость кадра зависела от окрестностей героя,
+    # а не от населения уровня; у пропущенных тиков анимация стоит на месте
+    def __init__(self, active_margin=ACTIVE_MARGIN, sleep_margin=SLEEP_MARGIN, interval=DROWSY_INTERVAL):
+        self.active_margin = active_margin
+        self.sleep_margin = sleep_margin
+        self.interval = interval
+        self.tick = 0
+        self.view = None
+        self.woken = {}
+        self.static = {}
+        self.counts = {'active': 0, 'drowsy': 0, 'asleep': 0}
+
+    def begin(self, view):
+        self.tick += 1
+        self.view = view
+        self.woken = {sprite: until for sprite, until in self.woken.items() if until >= self.tick}
+        self.counts = {'active': 0, 'drowsy': 0, 'asleep': 0}
+
+    def wake(self, sprite, ticks=WAKE_TICKS):
+        self.woken[sprite] = self.tick + ticks
+
+    def near(self, left, top, right, bottom, margin):
+        view = self.view
+        return ((left < view.right + margin) & (right > view.left - margin) &
+                (top < view.bottom + margin) & (bottom > view.top - margin))
+
+    def get_awake(self, left, top, right, bottom, index_of):
+        # маска тех, кто обновляется в этом тике; index_of даёт номер разбуженного спрайта в массивах
+        if self.view is None:
+            return np.ones(len(left), dtype=bool)
+        active = self.near(left, top, right, bottom, self.active_margin)
+        drowsy = self.near(left, top, right, bottom, self.sleep_margin) & ~active
+        # дремлющие обновляются вразнобой, чтобы не собираться в один тик
+        awake = active | (drowsy & ((np.arange(len(left)) + self.tick) % self.interval == 0))
+        for sprite in self.woken:
+            index = index_of(sprite)
+            if index is not None:
+                awake[index] = True
+        self.counts['active'] += int(active.sum())
+        self.counts['drowsy'] += int(drowsy.sum())
+        self.counts['asleep'] += len(left) - int((active | drowsy).sum())
+        return awake
+
+    def is_awake(self, rect, slot, sprite):
+        # то же решение для одного объекта, когда их мало и массивы не окупаются; slot - номер в группе
+        if self.view is None:
+            return True
+        bounds = rect.left, rect.top, rect.right, rect.bottom
+        if self.near(*bounds, self.active_margin):
+            self.counts['active'] += 1
+            return True
+        if self.near(*bounds, self.sleep_margin):
+            self.counts['drowsy'] += 1
+            return (slot + self.tick) % self.interval == 0 or sprite in self.woken
+        self.counts['asleep'] += 1
+        return sprite in self.woken
+
+    def select(self, group):
+        # ловушки и магазины не двигаются: их прямоугольники запоминаются, пока не изменится состав группы
+        sprites = group.sprites()
+        cached = self.static.get(group)
+        if cached is None or cached[0] != sprites:
+            rects = np.array([tuple(sprite.rect) for sprite in sprites], dtype=np.int64).reshape(-1, 4)
+            cached = (sprites, rects, {sprite: i for i, sprite in enumerate(sprites)})
+            self.static[group] = cached
+        sprites, rects, positions = cached
+        awake = self.get_awake(rects[:, 0], rects[:, 1], rects[:, 0] + rects[:, 2], rects[:, 1] + rects[:, 3],
+                               positions.get)
+        return [sprites[i] for i in np.flatnonzero(awake).tolist()]
+
+    def clear(self):
+        self.tick = 0
+        self.view = None
+        self.woken = {}
+        self.static = {}
+
+
+activity = ActivityScheduler()
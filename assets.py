@@ -0,0 +1,194 @@
+import json
+import os
+
+from methods import load_image
+from frames import frame_cache, SourceImage
+
+# атласы собирает atlas.py, без них кадры читаются из отдельных PNG
+ATLAS_DIR = "atlas"
+ATLAS_INDEX = os.path.join(ATLAS_DIR, "index.json")
+ATLAS_VERSION = 1
+
+# имя анимации -> (шаблон пути к кадру, количество кадров)
+ANIMATIONS = {
+    'hero_idle': ("data/hero_idle/{}.png", 10),
+    'hero_run': ("data/hero_run/{}.png", 10),
+    'hero_fall': ("data/hero_fall/{}.png", 3),
+    'hero_jump': ("data/hero_jump/{}.png", 3),
+    'hero_take_hit': ("data/hero_take_hit/{}.png", 3),
+    'hero_death': ("data/hero_death/{}.png", 10),
+    'hero_attack1': ("data/hero_attack1/{}.png", 4),
+    'hero_attack2': ("data/hero_attack2/{}.png", 6),
+    'hero_attack1_no': ("data/hero_attack1_NoMovement/{}.png", 4),
+    'hero_attack2_no': ("data/hero_attack2_NoMovement/{}.png", 6),
+
+    'skeleton_idle': ("data/skeleton_idle/{}.png", 4),
+    'skeleton_run': ("data/skeleton_run/{}.png", 4),
+    'skeleton_attack': ("data/skeleton_attack/{}.png", 8),
+    'skeleton_death': ("data/skeleton_death/{}.png", 4),
+    'skeleton_take_hit': ("data/skeleton_take_hit/{}.png", 4),
+
+    'mushroom_idle': ("data/mushroom_idle/{}.png", 4),
+    'mushroom_run': ("data/mushroom_run/{}.png", 8),
+    'mushroom_attack': ("data/mushroom_attack/{}.png", 8),
+    'mushroom_death': ("data/mushroom_death/{}.png", 4),
+    'mushroom_take_hit': ("data/mushroom_take_hit/{}.png", 4),
+
+    'archer_idle': ("data/archer_idle/{}.png", 5),
+    'archer_run': ("data/archer_run/{}.png", 8),
+    'archer_attack': ("data/archer_attack/{}.png", 11),
+    'archer_death': ("data/archer_death/{}.png", 6),
+    'archer_take_hit': ("data/archer_take_hit/{}.png", 5),
+
+    'arrow': ("data/weapon_objects/arrow.png", 1),
+    'spark1': ("particles/spark1/{}.png", 20),
+
+    'fire': ("traps/fire/{}.png", 19),
+    'electric_field': ("traps/electric/{}.png", 9),
+    'poison_cloud': ("traps/poison/{}.png", 19),
+    'tree': ("decorations/tree/1.png", 1),
+    'tombstone': ("decorations/tombstones/{}.png", 3),
+    'shop': ("decorations/shop/{}.png", 6),
+    'chest': ("decorations/chest/{}.png", 7),
+    'portal': ("decorations/portal/{}.png", 6),
+
+    'item_box': ("interface/item_box_border.png", 1),
+    'item_box_pattern': ("interface/item_box_pattern.png", 1),
+    'value_bar': ("interface/value_bar.png", 1),
+    'armor_icon': ("interface/armor_icon.png", 1),
+    'damage_icon': ("interface/damage_icon.png", 1),
+    'stamina_icon': ("interface/stamina_icon.png", 1),
+}
+
+
+def atlas_frame_digest(digest, rect):
+    return f"{digest}:{list(rect)}"
+
+
+class AssetManager:
+    def __init__(self, animations=ANIMATIONS):
+        self.animations = animations
+        self.loaded = {}
+        # сколько уровней (текущий и загружаемый) держат анимацию
+        self.refs = {}
+        self.level = set()
+        self.previous_level = set()
+        self.permanent = set()
+        self.atlas_index = None
+        self.sheets = {}
+        self.loads = 0
+        self.decodes = 0
+        self.unloads = 0
+
+    def get(self, name, permanent=False):
+        frames = self.loaded.get(name)
+        if frames is None:
+            frames = self.load_frames(name)
+            self.loaded[name] = frames
+            self.loads += 1
+        if permanent:
+            self.permanent.add(name)
+        elif name not in self.level:
+            self.level.add(name)
+            self.refs[name] = self.refs.get(name, 0) + 1
+        return frames
+
+    def load_frames(self, name):
+        entry = self.get_atlas_index().get(name)
+        if entry is None:
+            path, count = self.animations[name]
+            frames = [self.source(path.format(x)) for x in range(1, count + 1)]
+        else:
+            if entry['atlas'] not in self.sheets:
+                self.sheets[entry['atlas']] = self.source(os.path.join(ATLAS_DIR, entry['image']))
+            sheet = self.sheets[entry['atlas']]
+            frames = [SourceImage(lambda rect=frame['rect']: sheet.surface.subsurface(rect),
+                                  atlas_frame_digest(sheet.digest, frame['rect']) if sheet.digest else None)
+                      for frame in entry['frames']]
+        if frame_cache.store is not None:
+            frame_cache.store.manifest.save()
+        return frames
+
+    def source(self, path):
+        # хеш берётся из манифеста хранилища кадров, картинка декодируется только при промахе по диску
+        digest = frame_cache.store.manifest.digest(path) if frame_cache.store is not None else None
+        return SourceImage(lambda: self.decode(path), digest)
+
+    def decode(self, path):
+        self.decodes += 1
+        return load_image(path)
+
+    def get_atlas_index(self):
+        if self.atlas_index is None:
+            self.atlas_index = {}
+            try:
+                with open(ATLAS_INDEX, 'r') as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                return self.atlas_index
+            if metadata.get('version') == ATLAS_VERSION:
+                for name, entry in metadata['animations'].items():
+                    self.atlas_index[name] = dict(entry, image=metadata['atlases'][entry['atlas']]['image'])
+        return self.atlas_index
+
+    def image(self, name):
+        # одиночные картинки интерфейса живут всю игру
+        return self.get(name, permanent=True)[0].surface
+
+    def begin_level(self):
+        # анимации прошлого уровня держатся, пока новый не запросит свои
+        if self.previous_level:
+            self.end_level()
+        self.previous_level = self.level
+        self.level = set()
+
+    def end_level(self):
+        for name in self.previous_level:
+            self.refs[name] -= 1
+            if self.refs[name] == 0:
+                del self.refs[name]
+                if name not in self.permanent:
+                    self.unload(name)
+        self.previous_level = set()
+
+    def unload(self, name):
+        frames = self.loaded.pop(name, None)
+        if frames is not None:
+            frame_cache.discard(frames)
+            self.unloads += 1
+        # лист атласа держится, пока из него загружена хоть одна анимация
+        entry = self.get_atlas_index().get(name)
+        if entry is not None and not any(self.atlas_index.get(other, {}).get('atlas') == entry['atlas']
+                                         for other in self.loaded):
+            self.sheets.pop(entry['atlas'], None)
+
+    def stats(self):
+        return {
+            'animations': len(self.loaded),
+            'frames': sum(len(frames) for frames in self.loaded.values()),
+            'atlases': len(self.sheets),
+            'loads': self.loads,
+            'decodes': self.decodes,
+            'unloads': self.unloads
+        }
+
+
+class AnimationSet:
+    # набор анимаций сущности, кадры берутся у менеджера при обращении
+    def __init__(self, names):
+        self.names = names
+
+    def __getitem__(self, key):
+        return assets.get(self.names[key])
+
+    def __contains__(self, key):
+        return key in self.names
+
+    def keys(self):
+        return self.names.keys()
+
+    def values(self):
+        return [assets.get(name) for name in self.names.values()]
+
+
+assets = AssetManager()
@@ -0,0 +1,77 @@
+import json
+import os
+
+import pygame
+
+from assets import ANIMATIONS, ATLAS_DIR, ATLAS_INDEX, ATLAS_VERSION
+
+# атлас -> анимации, которые в него упаковываются
+ATLASES = {
+    'hero': ('hero_idle', 'hero_run', 'hero_fall', 'hero_jump', 'hero_take_hit', 'hero_death',
+             'hero_attack1', 'hero_attack2', 'hero_attack1_no', 'hero_attack2_no'),
+    'skeleton': ('skeleton_idle', 'skeleton_run', 'skeleton_attack', 'skeleton_death', 'skeleton_take_hit'),
+    'mushroom': ('mushroom_idle', 'mushroom_run', 'mushroom_attack', 'mushroom_death', 'mushroom_take_hit'),
+    'archer': ('archer_idle', 'archer_run', 'archer_attack', 'archer_death', 'archer_take_hit', 'arrow'),
+    'traps': ('fire', 'electric_field', 'poison_cloud'),
+    'decorations': ('tree', 'tombstone', 'shop', 'chest', 'portal'),
+    'particles': ('spark1',),
+    'interface': ('item_box', 'item_box_pattern', 'value_bar', 'armor_icon', 'damage_icon', 'stamina_icon'),
+}
+MAX_WIDTH = 2048
+PADDING = 1
+
+
+def pack(sizes, max_width=MAX_WIDTH):
+    # раскладка полками: кадры по убыванию высоты слева направо, новая полка при переполнении
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    positions = [None] * len(sizes)
+    x = y = shelf_height = width = 0
+    for i in order:
+        w, h = sizes[i]
+        if x and x + w > max_width:
+            x = 0
+            y += shelf_height + PADDING
+            shelf_height = 0
+        positions[i] = (x, y)
+        x += w + PADDING
+        width = max(width, x - PADDING)
+        shelf_height = max(shelf_height, h)
+    return positions, (width, y + shelf_height)
+
+
+def build_atlas(name, animations):
+    frames = []
+    for animation in animations:
+        path, count = ANIMATIONS[animation]
+        for x in range(1, count + 1):
+            frames.append((animation, pygame.image.load(path.format(x))))
+
+    positions, size = pack([image.get_size() for _, image in frames])
+    sheet = pygame.Surface(size, pygame.SRCALPHA)
+    index = {animation: {'atlas': name, 'frames': []} for animation in animations}
+    for (animation, image), position in zip(frames, positions):
+        sheet.blit(image, position)
+        bounds = image.get_bounding_rect()
+        index[animation]['frames'].append({
+            'rect': [*position, *image.get_size()],
+            'bounds': list(bounds),
+            'anchor': list(bounds.midbottom)
+        })
+    pygame.image.save(sheet, os.path.join(ATLAS_DIR, f"{name}.png"))
+    return {'image': f"{name}.png", 'size': list(size), 'frames': len(frames)}, index
+
+
+def build(atlases=ATLASES):
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+    metadata = {'version': ATLAS_VERSION, 'atlases': {}, 'animations': {}}
+    for name, animations in atlases.items():
+        atlas, index = build_atlas(name, animations)
+        metadata['atlases'][name] = atlas
+        metadata['animations'].update(index)
+        print(f"{name}: {atlas['frames']} кадров, {atlas['size'][0]}x{atlas['size'][1]}")
+    with open(ATLAS_INDEX, 'w') as f:
+        json.dump(metadata, f)
+
+
+if __name__ == '__main__':
+    build()
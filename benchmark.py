@@ -0,0 +1,275 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("IRON_KNIGHT_HEADLESS", "1")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+import map as game_map
+from hero import Player, hero_group
+from enemies import Enemy, skeleton_images, mushroom_images, archer_images, enemy_group
+from particles import ParticleEmitter, spark_emitter
+from projectiles import ProjectileManager, arrows
+from traps import Fire, Tree, Chest, trap_group, shop_group, animation_clocks
+from damage_numbers import DamageText, damage_text_group, damage_text_pool
+from frames import frame_cache, bake_frame
+from assets import assets
+from groups import entity_index
+from controls import FrameInput
+from activity import activity
+
+MAP_SCALES = (1, 4, 10)
+PARTICLE_COUNTS = (100, 1000, 4000)
+PROJECTILE_COUNTS = (16, 256)
+HORDE_SIZES = (100, 500)
+FIRE_COUNTS = (1, 100)
+REPEAT = 5
+
+
+def measure(function, number, repeat=REPEAT, setup=None):
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number * 1000)
+    return {
+        'min_ms': min(timings),
+        'median_ms': statistics.median(timings),
+        'iterations': number * repeat
+    }
+
+
+def reset_world():
+    for group in (game_map.sprite_group, trap_group, shop_group,
+                  enemy_group, damage_text_group, hero_group):
+        group.empty()
+    spark_emitter.clear()
+    arrows.clear()
+    activity.clear()
+    animation_clocks.clear()
+
+
+@contextlib.contextmanager
+def scaled_map(scale):
+    # уровень из map/3.txt, повторённый по горизонтали scale раз
+    with open("map/3.txt", 'r') as map_file:
+        rows = [line.rstrip('\n') for line in map_file]
+    width = max(map(len, rows))
+    rows = [row.ljust(width, '.') for row in rows]
+    scaled = [row + row.replace('@', '.') * (scale - 1) for row in rows]
+    map_file, path = tempfile.mkstemp(suffix='.txt')
+    with os.fdopen(map_file, 'w') as f:
+        f.write('\n'.join(scaled))
+    try:
+        yield path
+    finally:
+        os.remove(path)
+
+
+def load_world(game, path):
+    reset_world()
+    game.level_map = game.load_level(path)
+    game.hero = game.generate_level(game.level_map)
+    entity_index.rebuild(hero_group, enemy_group)
+
+
+def bench_cropped_images(results):
+    tiles = game_map.sprite_group
+    samples = {
+        'Player': (Player(300, 700, tiles), assets.get('hero_run'), "midbottom", True),
+        'Enemy': (Enemy(300, 700, tiles, hero_group, skeleton_images), assets.get('skeleton_run'), "midbottom", True),
+        'Object': (Fire(300, 700, "fire", hero_group, enemy_group), assets.get('fire'), "midbottom", False),
+        'Tree': (Tree(300, 700, "tree", hero_group, enemy_group), assets.get('tree'), "midbottom", True),
+        'Chest': (Chest(300, 700, "chest", hero_group, enemy_group, 100), assets.get('chest'), "midbottom", True),
+    }
+    for name, (sprite, images, anchor, crop) in samples.items():
+        def warm():
+            for image in images:
+                sprite.get_cropped_image(image)
+
+        def cold():
+            for image in images:
+                bake_frame(image.surface, sprite.scale_factor, sprite.rect.size, anchor, crop)
+
+        results[f'get_cropped_image.{name}'] = measure(warm, 50)
+        results[f'bake_frame.{name}'] = measure(cold, 5)
+    reset_world()
+
+
+def bench_entity_updates(results, game):
+    for scale in MAP_SCALES:
+        with scaled_map(scale) as path:
+            results[f'load_level.x{scale}'] = measure(lambda: game.load_level(path), 5)
+            results[f'generate_level.x{scale}'] = measure(lambda: load_world(game, path), 1)
+
+            load_world(game, path)
+            results[f'Player.update.x{scale}'] = measure(game.hero.update, 200)
+            results[f'Enemy.update.x{scale}'] = measure(enemy_group.update, 50)
+
+
+def bench_horde(results, game):
+    # толпа врагов всех трёх видов вдоль уровня, обновляется одним проходом группы
+    kinds = ((skeleton_images, 'melee', 'skeleton'), (mushroom_images, 'melee', 'mushroom'),
+             (archer_images, 'ranged', 'archer'))
+    for size in HORDE_SIZES:
+        with scaled_map(10) as path:
+            load_world(game, path)
+        row = max(enemy.real_rect.bottom for enemy in enemy_group) // game_map.TILE_HEIGHT - 1
+        columns = len(game.level_map[row])
+        for i in range(size):
+            images, enemy_type, name = kinds[i % len(kinds)]
+            Enemy((3 + i * 7 % (columns - 6)) * game_map.TILE_WIDTH, row * game_map.TILE_HEIGHT,
+                  game_map.sprite_group, hero_group, images, enemy_type=enemy_type, name=name)
+        enemy_group.update()
+        results[f'EnemyGroup.update.horde{size}'] = measure(enemy_group.update, 50)
+        # целый тик игры: дальние враги спят, стоимость зависит от окрестностей героя
+        game.hero.take_hit = lambda damage: None
+        idle = FrameInput()
+        game.step(idle)
+        results[f'Game.step.horde{size}'] = measure(lambda: game.step(idle), 50)
+
+
+def bench_traps(results, game):
+    with scaled_map(1) as path:
+        load_world(game, path)
+    fire = Fire(game.hero.real_rect.x, game.hero.real_rect.bottom - 64, "fire", hero_group, enemy_group)
+    fire.damage = 0
+    entity_index.rebuild(hero_group, enemy_group)
+    results['Object.damage_entity'] = measure(fire.damage_entity, 1000)
+
+    # анимация одинаковых костров: тик общих часов и картинка каждого, как при отрисовке
+    for count in FIRE_COUNTS:
+        reset_world()
+        fires = [Fire(i * 64, 700, "fire", hero_group, enemy_group) for i in range(count)]
+
+        def animate():
+            animation_clocks.update()
+            for fire in fires:
+                fire.image
+
+        results[f'Fire.animation.x{count}'] = measure(animate, 1000)
+    reset_world()
+
+
+def bench_damage_text(results):
+    results['DamageText.__init__'] = measure(lambda: DamageText(300, 300, 25), 500)
+    damage_text_group.empty()
+    text = DamageText(300, 300, 25)
+    results['DamageText.update'] = measure(text.update, 500)
+    damage_text_group.empty()
+
+
+def bench_particles(results):
+    view = pygame.Rect(0, 0, 1920, 1024)
+    for count in PARTICLE_COUNTS:
+        emitter = ParticleEmitter('spark1')
+
+        def burst():
+            emitter.clear()
+            emitter.emit(960, 512, count, speed=4)
+
+        results[f'ParticleEmitter.emit.x{count}'] = measure(burst, 50)
+        results[f'ParticleEmitter.update.x{count}'] = measure(emitter.update, 10, setup=burst)
+        results[f'ParticleEmitter.get_blits.x{count}'] = measure(lambda: emitter.get_blits((0, 0), view), 10,
+                                                                  setup=burst)
+
+
+def bench_projectiles(results, game):
+    with scaled_map(1) as path:
+        load_world(game, path)
+    view = pygame.Rect(0, 0, 1920, 1024)
+    for count in PROJECTILE_COUNTS:
+        manager = ProjectileManager('arrow', capacity=count)
+
+        def volley():
+            # стрелы летят по всему уровню, часть втыкается в стены
+            manager.clear()
+            for i in range(count):
+                manager.spawn(i * 37 % 3000, i * 53 % 1000, 1 if i % 2 else -1)
+
+        results[f'ProjectileManager.update.x{count}'] = measure(
+            lambda: manager.update(game_map.sprite_group, hero_group), 10, setup=volley)
+        results[f'ProjectileManager.get_blits.x{count}'] = measure(lambda: manager.get_blits((0, 0), view), 10,
+                                                                    setup=volley)
+
+
+def bench_pools(results):
+    # выдача из пула и возврат обратно, как при каждом попадании
+    results['damage_text_pool.spawn'] = measure(lambda: damage_text_pool.spawn(300, 300, 25).kill(), 500)
+
+
+def bench_draw(results, game):
+    with scaled_map(1) as path:
+        load_world(game, path)
+    for _ in range(120):
+        game.camera.update(game.hero)
+    results['Game.render'] = measure(game.render, 30)
+
+
+def run():
+    results = {}
+    # игра печатает отладочные сообщения, в выводе должен остаться только JSON
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = game_map.Game(headless=True, save_path=os.devnull)
+        try:
+            bench_cropped_images(results)
+            bench_entity_updates(results, game)
+            bench_horde(results, game)
+            bench_traps(results, game)
+            bench_damage_text(results)
+            bench_pools(results)
+            bench_projectiles(results, game)
+            bench_particles(results)
+            bench_draw(results, game)
+        finally:
+            reset_world()
+    results['frame_cache'] = frame_cache.stats()
+    results['assets'] = assets.stats()
+    return results
+
+
+def compare(results, baseline):
+    comparison = {}
+    for name, result in results.items():
+        if 'min_ms' not in result or name not in baseline:
+            continue
+        before = baseline[name]['min_ms']
+        comparison[name] = {
+            'baseline_ms': before,
+            'current_ms': result['min_ms'],
+            'ratio': result['min_ms'] / before if before else None
+        }
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Iron Knight hot path benchmarks")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare against results saved earlier with --output")
+    args = parser.parse_args()
+
+    results = run()
+    report = {'pygame': pygame.version.ver, 'results': results}
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            report['comparison'] = compare(results, json.load(f)['results'])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
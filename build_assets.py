@@ -0,0 +1,106 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from assets import ANIMATIONS, ATLAS_DIR, assets, atlas_frame_digest
+from frames import FrameStore, bake_frame, file_digest, scaled_size
+from methods import load_image
+from hero import Player
+from enemies import Enemy
+from particles import spark_emitter
+from projectiles import arrows
+from traps import Fire, ElectricField, PoisonCloud, Shop, Tree, Chest, Tombstone, Portal
+
+# размеры берутся у самих сущностей, чтобы заготовленные кадры не разошлись с тем, что запрашивает игра
+HERO = (Player.scale_factor, scaled_size(Player.frame_size, Player.scale_factor), "midbottom", True)
+MELEE = (Enemy.scale_factor, scaled_size(Enemy.frame_sizes['melee'], Enemy.scale_factor), "midbottom", True)
+RANGED = (Enemy.scale_factor, scaled_size(Enemy.frame_sizes['ranged'], Enemy.scale_factor), "midbottom", True)
+
+
+def object_spec(object_class):
+    return [(object_class.scale_factor, object_class.get_size(), "midbottom", object_class.crop)]
+
+
+# анимация -> параметры обработки (масштаб, размер, привязка, обрезка), с которыми её запрашивают сущности
+FRAME_SPECS = {
+    **{name: [HERO] for name in ('hero_idle', 'hero_run', 'hero_fall', 'hero_jump', 'hero_take_hit',
+                                 'hero_death', 'hero_attack1_no', 'hero_attack2_no')},
+    **{f"{enemy}_{animation}": [MELEE] for enemy in ('skeleton', 'mushroom')
+       for animation in ('idle', 'run', 'attack', 'death', 'take_hit')},
+    **{f"archer_{animation}": [RANGED] for animation in ('idle', 'run', 'attack', 'death', 'take_hit')},
+    'arrow': [(arrows.scale_factor, (arrows.width, arrows.height), "center", True)],
+    'spark1': [(spark_emitter.scale_factor, spark_emitter.size, "center", True)],
+    'fire': object_spec(Fire),
+    'electric_field': object_spec(ElectricField),
+    'poison_cloud': object_spec(PoisonCloud),
+    'shop': object_spec(Shop),
+    'tree': object_spec(Tree),
+    'chest': object_spec(Chest),
+    'tombstone': object_spec(Tombstone),
+    'portal': object_spec(Portal),
+}
+
+
+def init_worker():
+    # convert_alpha нужен видеорежим, в процессе сборки хватает фиктивного окна
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+
+
+def frame_sources(name):
+    # те же исходники и хеши, что регистрирует менеджер ресурсов в игре
+    entry = assets.get_atlas_index().get(name)
+    if entry is None:
+        path, count = ANIMATIONS[name]
+        for x in range(1, count + 1):
+            yield load_image(path.format(x)), file_digest(path.format(x))
+    else:
+        path = os.path.join(ATLAS_DIR, entry['image'])
+        sheet, digest = load_image(path), file_digest(path)
+        for frame in entry['frames']:
+            yield sheet.subsurface(frame['rect']), atlas_frame_digest(digest, frame['rect'])
+
+
+def build_animation(name, specs, force=False):
+    store = FrameStore()
+    written = skipped = 0
+    for image, digest in frame_sources(name):
+        for scale_factor, size, anchor, crop in specs:
+            path = store.frame_path(digest, scale_factor, size, anchor, crop)
+            if not force and os.path.exists(path):
+                skipped += 1
+                continue
+            store.save(path, bake_frame(image, scale_factor, size, anchor, crop))
+            written += 1
+    return name, written, skipped
+
+
+def build(workers=None, force=False, specs=FRAME_SPECS):
+    start = time.perf_counter()
+    written = skipped = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        jobs = [executor.submit(build_animation, name, animation_specs, force)
+                for name, animation_specs in specs.items()]
+        for job in as_completed(jobs):
+            name, animation_written, animation_skipped = job.result()
+            written += animation_written
+            skipped += animation_skipped
+    print(f"кадров записано: {written}, уже были: {skipped}, {time.perf_counter() - start:.2f} с")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Iron Knight processed frame builder")
+    parser.add_argument('--workers', type=int, help="number of worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="rebuild frames that are already cached")
+    parser.add_argument('--atlas', action='store_true', help="pack texture atlases before building frames")
+    args = parser.parse_args()
+    if args.atlas:
+        import atlas
+        atlas.build()
+    build(args.workers, args.force)
@@ -0,0 +1,36 @@
+import pygame
+
+# клавиши, которые игра опрашивает каждый кадр
+TRACKED_KEYS = (pygame.K_RIGHT, pygame.K_d, pygame.K_LEFT, pygame.K_a, pygame.K_SPACE)
+
+
+class FrameInput:
+    def __init__(self, keys=(), events=(), ui_events=()):
+        self.keys = frozenset(keys)
+        # события кадра по порядку: ("quit",), ("attack",), ("interact",), ("click", (x, y))
+        self.events = tuple(events)
+        # события интерфейса, не входят в симуляцию и в запись: ("profiler",), ("dump_profile",)
+        self.ui_events = tuple(ui_events)
+
+    def pressed(self, key):
+        return key in self.keys
+
+    @classmethod
+    def from_pygame(cls):
+        events = []
+        ui_events = []
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                events.append(("quit",))
+            if event.type == pygame.KEYUP and event.key == pygame.K_z:
+                events.append(("attack",))
+            if event.type == pygame.KEYUP and event.key == pygame.K_e:
+                events.append(("interact",))
+            if event.type == pygame.KEYUP and event.key == pygame.K_F3:
+                ui_events.append(("profiler",))
+            if event.type == pygame.KEYUP and event.key == pygame.K_F4:
+                ui_events.append(("dump_profile",))
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                events.append(("click", pygame.mouse.get_pos()))
+        pressed = pygame.key.get_pressed()
+        return cls([key for key in TRACKED_KEYS if pressed[key]], events, ui_events)
@@ -1,16 +1,79 @@
 import random
 import pygame
 
-from groups import SpriteGroup
-from methods import load_image
+from groups import SpriteGroup, PooledSprite, SpritePool
 
 damage_text_group = SpriteGroup()
 
+# символы, которые готовятся заранее для каждого стиля текста
+PRELOADED_GLYPHS = "0123456789$.-"
 
-class DamageText(pygame.sprite.Sprite):
-    def __init__(self, x, y, damage, color=(255, 0, 0), outline_color=(0, 0, 0),
-                 outline_thickness=1, duration=100, rise_speed=1, size=32):
-        super().__init__(damage_text_group)
+
+class GlyphCache:
+    def __init__(self):
+        self.fonts = {}
+        self.styles = {}
+
+    def get_font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+
+    def get_glyphs(self, size, color, outline_color, outline_thickness):
+        style = (size, color, outline_color, outline_thickness)
+        glyphs = self.styles.get(style)
+        if glyphs is None:
+            glyphs = {}
+            self.styles[style] = glyphs
+            for char in PRELOADED_GLYPHS:
+                self.get_glyph(glyphs, style, char)
+        return style, glyphs
+
+    def get_glyph(self, glyphs, style, char):
+        glyph = glyphs.get(char)
+        if glyph is None:
+            size, color, outline_color, outline_thickness = style
+            font = self.get_font(size)
+            text_surface = font.render(char, True, color)
+            outline_surface = font.render(char, True, outline_color)
+            outline = pygame.Surface((text_surface.get_width() + 2 * outline_thickness,
+                                      text_surface.get_height() + 2 * outline_thickness), pygame.SRCALPHA)
+            for dx in range(-outline_thickness, outline_thickness + 1):
+                for dy in range(-outline_thickness, outline_thickness + 1):
+                    if dx == 0 and dy == 0:
+                        continue
+                    outline.blit(outline_surface, (outline_thickness + dx, outline_thickness + dy))
+            glyph = (text_surface, outline, font.size(char)[0])
+            glyphs[char] = glyph
+        return glyph
+
+    def render(self, text, size, color, outline_color, outline_thickness):
+        # сначала обводка всех символов, поверх неё сам текст, как при отрисовке строки целиком
+        style, glyphs = self.get_glyphs(size, color, outline_color, outline_thickness)
+        text_glyphs = [self.get_glyph(glyphs, style, char) for char in text]
+        width = sum(advance for _, _, advance in text_glyphs) + 2 * outline_thickness
+        height = self.get_font(size).get_height() + 2 * outline_thickness
+        image = pygame.Surface((width, height), pygame.SRCALPHA)
+        x = 0
+        for _, outline, advance in text_glyphs:
+            image.blit(outline, (x, 0))
+            x += advance
+        x = outline_thickness
+        for text_surface, _, advance in text_glyphs:
+            image.blit(text_surface, (x, outline_thickness))
+            x += advance
+        return image
+
+
+glyph_cache = GlyphCache()
+
+
+class DamageText(PooledSprite):
+    def reset(self, x, y, damage, color=(255, 0, 0), outline_color=(0, 0, 0),
+              outline_thickness=1, duration=100, rise_speed=1, size=32):
+        self.add(damage_text_group)
         self.x = x
         self.y = y
         self.damage = str(damage)
@@ -21,48 +84,27 @@ class DamageText(pygame.sprite.Sprite):
         self.outline_thickness = outline_thickness
         self.alpha = 255
         self.expire_timer = 0
-        self.font = pygame.font.Font(None, size)
         self.x += random.randint(-20, 20)
         self.y += random.randint(-10, 10)
-        self.image = None
-        self.rect = None
-        self._update_surfaces()
+        # текст собирается из готовых символов один раз, дальше меняется только прозрачность
+        self.image = glyph_cache.render(self.damage, size, color, outline_color, outline_thickness)
+        self.rect = self.image.get_rect(center=(self.x, self.y))
 
     def update(self):
         self.y -= self.rise_speed
         self.expire_timer += 1
         if self.expire_timer >= self.duration:
             self.alpha -= 10
+            self.image.set_alpha(max(0, int(self.alpha)))
             if self.expire_timer >= self.duration + 60:
                 print("убил текст")
                 self.kill()
-        self._update_surfaces()
-
-    def _update_surfaces(self):
-        text_surface = self.font.render(self.damage, True, self.color)
-        outline_surface = self.font.render(self.damage, True, self.outline_color)
-
-        text_surface.set_alpha(int(self.alpha))
-        outline_surface.set_alpha(int(self.alpha))
-
-        width = text_surface.get_width() + 2 * self.outline_thickness
-        height = text_surface.get_height() + 2 * self.outline_thickness
-        self.image = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.rect.center = (self.x, self.y)
 
-        for dx in range(-self.outline_thickness, self.outline_thickness + 1):
-            for dy in range(-self.outline_thickness, self.outline_thickness + 1):
-                if dx == 0 and dy == 0:
-                    continue
-                self.image.blit(outline_surface,
-                                (self.outline_thickness + dx,
-                                 self.outline_thickness + dy))
-
-        self.image.blit(text_surface,
-                        (self.outline_thickness,
-                         self.outline_thickness))
+class MoneyText(DamageText):
+    def reset(self, x, y, count, color=(255, 215, 0), outline_color=(0, 0, 0), outline_thickness=1, duration=150, rise_speed=0.7, size=42):
+        super().reset(x, y, f"{count}$", color, outline_color, outline_thickness, duration, rise_speed, size)
 
-        self.rect = self.image.get_rect(center=(self.x, self.y))
 
-class MoneyText(DamageText):
-    def __init__(self, x, y, count, color=(255, 215, 0), outline_color=(0, 0, 0), outline_thickness=1, duration=150, rise_speed=0.7, size=42):
-        super().__init__(x, y, f"{count}$", color, outline_color, outline_thickness, duration, rise_speed, size)
+damage_text_pool = SpritePool(DamageText)
+money_text_pool = SpritePool(MoneyText)
@@ -1,33 +1,17 @@
 import random
 
+import numpy as np
 import pygame
-from methods import load_image
 from groups import SpriteGroup
-from particles import Particle
-from damage_numbers import DamageText
+from frames import frame_cache, scaled_size
+from assets import assets, AnimationSet
+from particles import spark_emitter
+from damage_numbers import damage_text_pool
+from projectiles import arrows, round_half_away
+from activity import activity, INDEX_MARGIN
 
-pygame.init()
 WIDTH, HEIGHT = 1920, 1080
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
-
-SKELETON_IDLE = [load_image(f"data/skeleton_idle/{x}.png") for x in range(1, 5)]
-SKELETON_RUN = [load_image(f"data/skeleton_run/{x}.png") for x in range(1, 5)]
-SKELETON_ATTACK = [load_image(f"data/skeleton_attack/{x}.png") for x in range(1, 9)]
-SKELETON_DEATH = [load_image(f"data/skeleton_death/{x}.png") for x in range(1, 5)]
-SKELETON_TAKE_HIT = [load_image(f"data/skeleton_take_hit/{x}.png") for x in range(1, 5)]
-
-MUSHROOM_IDLE = [load_image(f"data/mushroom_idle/{x}.png") for x in range(1, 5)]
-MUSHROOM_RUN = [load_image(f"data/mushroom_run/{x}.png") for x in range(1, 9)]
-MUSHROOM_ATTACK = [load_image(f"data/mushroom_attack/{x}.png") for x in range(1, 9)]
-MUSHROOM_DEATH = [load_image(f"data/mushroom_death/{x}.png") for x in range(1, 5)]
-MUSHROOM_TAKE_HIT = [load_image(f"data/mushroom_take_hit/{x}.png") for x in range(1, 5)]
-
-ARCHER_IDLE = [load_image(f"data/archer_idle/{x}.png") for x in range(1, 6)]
-ARCHER_RUN = [load_image(f"data/archer_run/{x}.png") for x in range(1, 9)]
-ARCHER_ATTACK = [load_image(f"data/archer_attack/{x}.png") for x in range(1, 12)]
-ARCHER_DEATH = [load_image(f"data/archer_death/{x}.png") for x in range(1, 7)]
-ARCHER_TAKE_HIT = [load_image(f"data/archer_take_hit/{x}.png") for x in range(1, 6)]
+
 enemy_damage = {
     1: {
         "mushroom": 15,
@@ -45,119 +29,438 @@ enemy_damage = {
         "archer": 120
     }
 }
-enemy_group = SpriteGroup()
-weapon_object_group = SpriteGroup()
-
-skeleton_images = {
-    'idle': SKELETON_IDLE,
-    'fall': SKELETON_IDLE,
-    'run': SKELETON_RUN,
-    'attack': SKELETON_ATTACK,
-    'death': SKELETON_DEATH,
-    'take_hit': SKELETON_TAKE_HIT
+# коды анимаций врага в массивах группы
+ANIMATION_NAMES = ('idle', 'fall', 'jump', 'run', 'attack', 'death', 'take_hit')
+IDLE, FALL, JUMP, RUN, ATTACK, DEATH, TAKE_HIT = range(len(ANIMATION_NAMES))
+# до стольких врагов группа обновляет каждого по отдельности: на обычном уровне их около десятка,
+# и постоянные накладные расходы numpy на вызов дороже самой работы; массивы окупаются с нескольких десятков
+SCALAR_LIMIT = 24
+
+# состояние врага, которое хранится в массивах группы, а не в атрибутах спрайта
+ENEMY_FIELDS = {
+    'is_alive': bool,
+    'taking_hit': bool,
+    'is_attacking': bool,
+    'on_ground': bool,
+    'need_obj': bool,
+    'velocity_x': np.float64,
+    'velocity_y': np.float64,
+    'gravity': np.float64,
+    'direction': np.int64,
+    'walking_auto_timer': np.int64,
+    'walking_auto_delay': np.int64,
+    'current_animation': np.int64,
+    'animation_index': np.int64,
+    'animation_timer': np.int64,
+    'animation_speed': np.int64,
+    'attack_timer': np.int64,
+    'current_alpha': np.int64
 }
-
-mushroom_images = {
-    'idle': MUSHROOM_IDLE,
-    'fall': MUSHROOM_IDLE,
-    'run': MUSHROOM_RUN,
-    'attack': MUSHROOM_ATTACK,
-    'death': MUSHROOM_DEATH,
-    'take_hit': MUSHROOM_TAKE_HIT
+# положение прямоугольников врага и то, что у него не меняется
+ENEMY_GEOMETRY = {
+    'real_x': np.int64, 'real_y': np.int64, 'real_width': np.int64, 'real_height': np.int64,
+    'rect_x': np.int64, 'rect_y': np.int64, 'rect_width': np.int64, 'rect_height': np.int64,
+    'search_x': np.int64, 'search_y': np.int64, 'search_width': np.int64, 'search_height': np.int64,
+    'ranged': bool, 'active': bool, 'synced': bool, 'fresh': bool
 }
 
-archer_images = {
-    'idle': ARCHER_IDLE,
-    'fall': ARCHER_IDLE,
-    'run': ARCHER_RUN,
-    'attack': ARCHER_ATTACK,
-    'death': ARCHER_DEATH,
-    'take_hit': ARCHER_TAKE_HIT
-}
 
+def overlaps(left, top, width, height, rect):
+    return (left < rect.right) & (left + width > rect.left) & (top < rect.bottom) & (top + height > rect.top)
 
-class Arrow(pygame.sprite.Sprite):
-    def __init__(self, x, y, sprite_group, hero_group, direction, damage=20):
-        super().__init__(weapon_object_group)
-        print("создался")
-        self.scale_factor = 1.5
-        self.speed = 15 * direction
-        self.sprite_group = sprite_group
-        self.hero_group = hero_group
-        self.distance = 0
-        self.stopped = False
-        self.rect = pygame.Rect(x - 10, y - 5, 30 * self.scale_factor, 5 * self.scale_factor)
-        self.damage = damage
-        self.original_image = load_image(f"data/weapon_objects/arrow.png")
-        self.image = self.get_cropped_image(self.original_image)
-        if direction == -1:
-            self.image = pygame.transform.flip(self.image, True, False)
-
-    def get_cropped_image(self, original_image):
-        non_transparent_rect = original_image.get_bounding_rect()
-        crop_width = non_transparent_rect.width
-        crop_height = non_transparent_rect.height
-
-        crop_rect = pygame.Rect(
-            non_transparent_rect.x + (non_transparent_rect.width // 2) - (crop_width // 2),
-            non_transparent_rect.y + (non_transparent_rect.height // 2) - (crop_height // 2),
-            crop_width,
-            crop_height
-        )
-
-        cropped_image = pygame.Surface((crop_width, crop_height), pygame.SRCALPHA)
-
-        cropped_image.blit(original_image, (0, 0), crop_rect)
-
-        scaled_image = pygame.transform.scale(cropped_image,
-                                              (int(crop_width * self.scale_factor),
-                                               int(crop_height * self.scale_factor)))
-
-        centered_image = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-
-        x_pos = (self.rect.width - scaled_image.get_width()) // 2
-        y_pos = (self.rect.height - scaled_image.get_height()) // 2
-        
 
-        centered_image.blit(scaled_image, (x_pos, y_pos))
+class BatchField:
+    # атрибут врага, который лежит в массиве его группы; вне группы хранится у самого спрайта
+    def __set_name__(self, owner, name):
+        self.name = name
 
-        return centered_image
+    def __get__(self, enemy, owner=None):
+        if enemy is None:
+            return self
+        if enemy.batch is None:
+            return enemy.__dict__[self.name]
+        return getattr(enemy.batch, self.name)[enemy.index].item()
 
-    def update(self):
-        if not self.stopped:
-            self.check_for_collision_player()
-            self.check_for_collision()
-            self.rect.y += abs(self.distance / 500)
-            self.rect.x += self.speed
-            self.distance += self.speed
-            self.speed -= 0.02
-
-    def check_for_collision_player(self):
-        if self.hero_group.get_sprites():
-            player = self.hero_group.get_sprites()[0]
-            if self.rect.colliderect(player.real_rect):
-                player.take_hit(self.damage)
-                Particle(player.real_rect.centerx, player.real_rect.centery, "spark1")
-                self.destroy()
-
-    def check_for_collision(self):
-        for sprite in self.sprite_group:
-            if self.rect.colliderect(sprite.rect):
-                self.stop()
-
-    def stop(self):
-        self.stopped = True
-
-    def destroy(self):
-        self.kill()
+    def __set__(self, enemy, value):
+        if enemy.batch is None:
+            enemy.__dict__[self.name] = value
+        else:
+            getattr(enemy.batch, self.name)[enemy.index] = value
+
+
+class AnimationField(BatchField):
+    def __get__(self, enemy, owner=None):
+        if enemy is None:
+            return self
+        return ANIMATION_NAMES[super().__get__(enemy, owner)]
+
+    def __set__(self, enemy, value):
+        super().__set__(enemy, ANIMATION_NAMES.index(value))
+
+
+class EnemyGroup(SpriteGroup):
+    # блуждание, поиск героя, гравитация, столкновения и таймеры анимации всех врагов
+    # считаются массивами; спрайтам достаются только атаки, смерть и смена кадра.
+    # пока врагов не больше SCALAR_LIMIT, они хранят состояние у себя и обновляются по одному
+    def __init__(self, capacity=64):
+        super().__init__()
+        self.capacity = capacity
+        self.batched = False
+        self.count = 0
+        self.slots = []
+        self.tiles = None
+        self.player = None
+        for name, dtype in {**ENEMY_FIELDS, **ENEMY_GEOMETRY}.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        # число кадров каждой анимации и показанный сейчас кадр (анимация, номер, отражение, прозрачность)
+        self.frames = np.zeros((capacity, len(ANIMATION_NAMES)), dtype=np.int64)
+        self.shown = np.zeros((capacity, 4), dtype=np.int64)
+
+    def get_arrays(self):
+        return [getattr(self, name) for name in (*ENEMY_FIELDS, *ENEMY_GEOMETRY, 'frames', 'shown')]
+
+    def grow(self):
+        for name in (*ENEMY_FIELDS, *ENEMY_GEOMETRY, 'frames', 'shown'):
+            array = getattr(self, name)
+            grown = np.zeros((self.capacity * 2, *array.shape[1:]), dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+        self.capacity *= 2
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        if self.batched:
+            self.attach(sprite)
+
+    def attach(self, sprite):
+        if sprite.batch is self:
+            # вернули в группу до того, как массивы уплотнились
+            self.active[sprite.index] = True
+            return
+        if self.count == self.capacity:
+            self.grow()
+        index = self.count
+        for name in ENEMY_FIELDS:
+            getattr(self, name)[index] = sprite.__dict__.pop(name, 0)
+        self.active[index] = True
+        self.synced[index] = False
+        self.fresh[index] = sprite.__dict__.pop('fresh', True)
+        sprite.batch, sprite.index = self, index
+        self.slots.append(sprite)
+        self.count += 1
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        if sprite.batch is self:
+            self.active[sprite.index] = False
+
+    def set_batched(self, batched):
+        # переход между массивами и состоянием у спрайтов, когда число врагов пересекает SCALAR_LIMIT
+        self.compact()
+        if batched:
+            self.batched = True
+            for sprite in self.sprites():
+                self.attach(sprite)
+            return
+        for index, sprite in enumerate(self.slots):
+            self.detach(sprite, index)
+        self.slots = []
+        self.count = 0
+        self.batched = False
+
+    def detach(self, sprite, index):
+        for name in ENEMY_FIELDS:
+            sprite.__dict__[name] = getattr(self, name)[index].item()
+        sprite.fresh = bool(self.fresh[index])
+        sprite.shown = None
+        sprite.batch = sprite.index = None
+
+    def compact(self):
+        count = self.count
+        active = self.active[:count].copy()
+        if active.all():
+            return
+        for index in np.flatnonzero(~active).tolist():
+            self.detach(self.slots[index], index)
+        live = int(active.sum())
+        for array in self.get_arrays():
+            array[:live] = array[:count][active]
+        self.slots = [sprite for sprite, keep in zip(self.slots, active.tolist()) if keep]
+        for index, sprite in enumerate(self.slots):
+            sprite.index = index
+        self.count = live
+
+    def sync(self):
+        # прямоугольники и кадры новых врагов переносятся в массивы один раз
+        for index in np.flatnonzero(~self.synced[:self.count]).tolist():
+            enemy = self.slots[index]
+            self.real_x[index], self.real_y[index], self.real_width[index], self.real_height[index] = enemy.real_rect
+            self.rect_x[index], self.rect_y[index], self.rect_width[index], self.rect_height[index] = enemy.rect
+            (self.search_x[index], self.search_y[index],
+             self.search_width[index], self.search_height[index]) = enemy.search_rect
+            self.ranged[index] = enemy.enemy_type == 'ranged'
+            self.frames[index] = [enemy.frame_counts.get(name, 0) for name in ANIMATION_NAMES]
+            self.shown[index] = -1
+            self.synced[index] = True
+            # все враги уровня стоят на одной карте и ищут одного героя
+            self.tiles = enemy.sprite_group
+            self.player = enemy.player
+
+    def get_index(self, sprite):
+        return sprite.index if sprite.batch is self else None
+
+    def get_bounds(self, count):
+        left, top = self.real_x[:count], self.real_y[:count]
+        return left, top, left + self.real_width[:count], top + self.real_height[:count]
+
+    def get_nearby(self):
+        # враги, которых в этом тике могут задеть герой и не спящие ловушки
+        if not self.batched:
+            if activity.view is None:
+                return self.sprites()
+            margin = activity.sleep_margin + INDEX_MARGIN
+            return [sprite for sprite in self
+                    if activity.near(*sprite.real_rect.topleft, *sprite.real_rect.bottomright, margin)
+                    or sprite in activity.woken]
+        self.compact()
+        self.sync()
+        if activity.view is None:
+            return self.slots[:self.count]
+        nearby = self.active[:self.count] & activity.near(*self.get_bounds(self.count),
+                                                          activity.sleep_margin + INDEX_MARGIN)
+        for sprite in activity.woken:
+            if sprite.batch is self:
+                nearby[sprite.index] = True
+        return [self.slots[i] for i in np.flatnonzero(nearby).tolist()]
 
-    def draw(self, screen):
-        border_color = (255, 0, 0)  
-        border_thickness = 2  
-        pygame.draw.rect(screen, border_color, self.rect, border_thickness)
+    def update(self):
+        batched = len(self) > SCALAR_LIMIT
+        if batched != self.batched:
+            self.set_batched(batched)
+        if not batched:
+            self.update_sprites()
+            return
+        self.compact()
+        self.sync()
+        count = self.count
+        if not count:
+            return
+        enemies = self.slots
+        # спящие враги пропускают тик целиком, в том числе таймеры и анимацию
+        awake = self.active[:count] & activity.get_awake(*self.get_bounds(count), self.get_index)
+        if not awake.any():
+            return
+
+        checked = np.flatnonzero(awake)
+        health = np.fromiter((enemies[i].health for i in checked.tolist()), np.float64, len(checked))
+        for index in checked[~self.is_alive[checked] | (health <= 0)].tolist():
+            enemies[index].check_health()
+
+        awake &= self.active[:count]
+        alive = self.is_alive[:count] & awake
+        direction = self.direction[:count]
+        velocity_x, velocity_y = self.velocity_x[:count], self.velocity_y[:count]
+        gravity = self.gravity[:count]
+        on_ground = self.on_ground[:count]
+
+        # бродят по своему таймеру и разворачиваются в конце прогулки
+        timer = self.walking_auto_timer[:count]
+        timer[alive] += 1
+        phase = timer - self.walking_auto_delay[:count]
+        walking = alive & (phase > 0) & (phase < 60)
+        turning = walking & (phase == 59)
+        timer[turning] = 0
+        direction[turning] *= -1
+        velocity_x[alive] = np.where(walking, 5 * direction, 0)[alive]
+
+        self.search_player(enemies, alive)
+
+        taking_hit, attacking = self.taking_hit[:count], self.is_attacking[:count]
+        animation, index = self.current_animation[:count], self.animation_index[:count]
+        frames = self.frames[:count]
+        free = alive & ~taking_hit
+        self.attack_timer[:count][free & attacking] += self.animation_speed[:count][free & attacking]
+        moving = free & ~attacking
+        airborne = moving & ~on_ground
+        velocity_y[airborne] += gravity[airborne]
+        state = np.where(on_ground, np.where(velocity_x != 0, RUN, IDLE), np.where(velocity_y > 0, FALL, JUMP))
+        changed = moving & (animation != state)
+        animation[changed] = state[changed]
+        index[changed] = 0
+        taking_hit[alive & taking_hit & (animation == TAKE_HIT) & (index == frames[:, TAKE_HIT] - 1)] = False
+        dead = awake & ~alive
+        velocity_x[dead] = 0
+        falling = (dead | taking_hit) & ~on_ground
+        velocity_y[falling] += gravity[falling]
+
+        self.move(count, awake)
+        self.fresh[:count][awake] = False
+
+        self.update_animation(count, alive, awake)
+        flip = direction == -1
+        shown = np.stack((animation, index, flip, self.current_alpha[:count]), axis=1)
+        changed = awake & (shown != self.shown[:count]).any(axis=1)
+        for i in np.flatnonzero(changed).tolist():
+            enemies[i].show_frame()
+        self.shown[:count][changed] = shown[changed]
+
+        shooting = (alive & self.ranged[:count] & self.need_obj[:count] & (animation == ATTACK) &
+                    (index == frames[:, ATTACK] - 2))
+        for i in np.flatnonzero(shooting).tolist():
+            arrows.spawn(*enemies[i].real_rect.midright, int(direction[i]), enemies[i].damage)
+        self.need_obj[:count][shooting] = False
+
+    def update_sprites(self):
+        # по одному, с теми же шагами, что и у массивов, но без накладных расходов numpy
+        for slot, enemy in enumerate(self.sprites()):
+            if activity.is_awake(enemy.real_rect, slot, enemy):
+                enemy.update()
+
+    def search_player(self, enemies, alive):
+        hero = next(iter(self.player), None)
+        if hero is None or not hero.is_alive:
+            return
+        count = self.count
+        target = hero.real_rect
+        in_range = alive & overlaps(self.search_x[:count], self.search_y[:count],
+                                    self.search_width[:count], self.search_height[:count], target)
+        touching = in_range & overlaps(self.rect_x[:count], self.rect_y[:count],
+                                       self.rect_width[:count], self.rect_height[:count], target)
+        chasing = in_range & ~touching
+        for i in np.flatnonzero(touching).tolist():
+            enemy = enemies[i]
+            if enemy.attack() == "continued":
+                spark_emitter.emit(target.centerx, target.centery)
+                hero.take_hit(enemy.damage)
+            if not hero.is_alive:
+                # враги дальше по списку уже не видят погибшего героя
+                chasing[i + 1:] = False
+                break
+        centerx = self.search_x[:count] + self.search_width[:count] // 2
+        self.velocity_x[:count][chasing] = np.where(target.centerx > centerx, 4, -4)[chasing]
+
+    def move(self, count, awake):
+        # как у Rect: сдвиг с округлением, затем упор в первую задетую клетку карты;
+        # стоящих на месте врагов это не касается, их прямоугольники и опора не меняются
+        tiles = self.tiles
+        x, y = self.real_x[:count].copy(), self.real_y[:count].copy()
+
+        velocity_x = self.velocity_x[:count]
+        stepping = np.flatnonzero(awake & (velocity_x != 0))
+        if len(stepping):
+            speed, width = velocity_x[stepping], self.real_width[stepping]
+            moved_x = round_half_away(x[stepping] + speed)
+            hit, col, row = tiles.get_first_colliding_cells(moved_x, y[stepping], width, self.real_height[stepping])
+            moved_x = np.where(hit & (speed > 0), col * tiles.cell_width - width, moved_x)
+            x[stepping] = np.where(hit & (speed < 0), (col + 1) * tiles.cell_width, moved_x)
+            velocity_x[stepping[hit]] = 0
+
+        velocity_y = self.velocity_y[:count]
+        stepping = np.flatnonzero(awake & (velocity_y != 0))
+        if len(stepping):
+            speed, height = velocity_y[stepping], self.real_height[stepping]
+            moved_y = round_half_away(y[stepping] + speed)
+            hit, col, row = tiles.get_first_colliding_cells(x[stepping], moved_y, self.real_width[stepping], height)
+            moved_y = np.where(hit & (speed > 0), row * tiles.cell_height - height, moved_y)
+            y[stepping] = np.where(hit & (speed < 0), (row + 1) * tiles.cell_height, moved_y)
+            velocity_y[stepping[hit]] = 0
+
+        # новые враги ещё не выровнены по центру и не проверяли опору
+        moved = np.flatnonzero(awake & ((x != self.real_x[:count]) | (y != self.real_y[:count]) | self.fresh[:count]))
+        if not len(moved):
+            return
+        x, y = x[moved], y[moved]
+        width, height = self.real_width[moved], self.real_height[moved]
+        centerx, centery = x + width // 2, y + height // 2
+        rect_x = centerx - self.rect_width[moved] // 2
+        rect_y = centery - self.rect_height[moved] // 2
+        search_x = centerx - self.search_width[moved] // 2
+        search_y = centery - self.search_height[moved] // 2
+        self.real_x[moved], self.real_y[moved] = x, y
+        self.rect_x[moved], self.rect_y[moved] = rect_x, rect_y
+        self.search_x[moved], self.search_y[moved] = search_x, search_y
+        self.on_ground[moved] = tiles.get_first_colliding_cells(x, y + 2, width, height)[0]
+        for enemy, position in zip([self.slots[i] for i in moved.tolist()],
+                                   np.stack((x, y, rect_x, rect_y, search_x, search_y), axis=1).tolist()):
+            enemy.real_rect.topleft = position[0:2]
+            enemy.rect.topleft = position[2:4]
+            enemy.search_rect.topleft = position[4:6]
+
+    def update_animation(self, count, alive, awake):
+        animation, index = self.current_animation[:count], self.animation_index[:count]
+        frames = self.frames[:count]
+        timer = self.animation_timer[:count]
+        timer[awake] += self.animation_speed[:count][awake]
+        ticked = awake & (timer >= 10)
+        timer[ticked] = 0
+        # у мёртвого анимация смерти останавливается на последнем кадре
+        index[ticked & (alive | (index != frames[:, DEATH] - 1))] += 1
+        self.attack_timer[:count][ticked] = 0
+        ended = ticked & (index >= frames[np.arange(count), animation])
+        finished = ended & self.is_attacking[:count]
+        self.is_attacking[:count][finished] = False
+        animation[finished] = IDLE
+        index[ended] = 0
+
+        velocity_x, direction = self.velocity_x[:count], self.direction[:count]
+        direction[awake & (velocity_x < 0)] = -1
+        direction[awake & (velocity_x > 0)] = 1
+
+
+enemy_group = EnemyGroup()
+
+skeleton_images = AnimationSet({
+    'idle': 'skeleton_idle',
+    'fall': 'skeleton_idle',
+    'run': 'skeleton_run',
+    'attack': 'skeleton_attack',
+    'death': 'skeleton_death',
+    'take_hit': 'skeleton_take_hit'
+})
+
+mushroom_images = AnimationSet({
+    'idle': 'mushroom_idle',
+    'fall': 'mushroom_idle',
+    'run': 'mushroom_run',
+    'attack': 'mushroom_attack',
+    'death': 'mushroom_death',
+    'take_hit': 'mushroom_take_hit'
+})
+
+archer_images = AnimationSet({
+    'idle': 'archer_idle',
+    'fall': 'archer_idle',
+    'run': 'archer_run',
+    'attack': 'archer_attack',
+    'death': 'archer_death',
+    'take_hit': 'archer_take_hit'
+})
 
 
 class Enemy(pygame.sprite.Sprite):
+    batch = None
+    index = None
+    is_alive = BatchField()
+    taking_hit = BatchField()
+    is_attacking = BatchField()
+    on_ground = BatchField()
+    need_obj = BatchField()
+    velocity_x = BatchField()
+    velocity_y = BatchField()
+    gravity = BatchField()
+    direction = BatchField()
+    walking_auto_timer = BatchField()
+    walking_auto_delay = BatchField()
+    current_animation = AnimationField()
+    animation_index = BatchField()
+    animation_timer = BatchField()
+    animation_speed = BatchField()
+    attack_timer = BatchField()
+    current_alpha = BatchField()
+    # масштаб и размер кадра по типу врага, по ним же build_assets.py заранее готовит кадры
+    scale_factor = 2
+    frame_sizes = {'melee': (90, 55), 'ranged': (450, 55)}
+
     def __init__(self, x, y, sprite_group, hero_group, images, max_health=100, enemy_type="melee", cur_lvl=1, name="skeleton"):
         super().__init__(enemy_group)
         self.enemy_type = enemy_type
@@ -166,7 +469,6 @@ class Enemy(pygame.sprite.Sprite):
         self.name = name
         self.current_animation = 'idle'
         self.animation_index = 0
-        self.scale_factor = 2
         self.damage = enemy_damage[cur_lvl][self.name]
 
         self.sprite_group = sprite_group
@@ -175,10 +477,10 @@ class Enemy(pygame.sprite.Sprite):
         self.attack_timer = 0
         if self.enemy_type == "melee":
             self.search_rect = pygame.Rect(0, 0, 360, 55)
-            self.original_rect = pygame.Rect(0, 0, 90, 55)
+            self.original_rect = pygame.Rect((0, 0), self.frame_sizes['melee'])
         elif self.enemy_type == "ranged":
             self.search_rect = pygame.Rect(0, 0, 540, 55)
-            self.original_rect = pygame.Rect(0, 0, 450, 55)
+            self.original_rect = pygame.Rect((0, 0), self.frame_sizes['ranged'])
         self.fact_rect = pygame.Rect(0, 0, 30, 55)
 
         
@@ -188,15 +490,23 @@ class Enemy(pygame.sprite.Sprite):
         x = x - self.fact_rect.width - 30
         y = y - self.fact_rect.height + 8
 
-        self.rect = pygame.Rect(x, y,
-                                self.original_rect.width * self.scale_factor,
-                                self.original_rect.height * self.scale_factor)
+        self.rect = pygame.Rect((x, y), scaled_size(self.original_rect.size, self.scale_factor))
 
         self.real_rect = pygame.Rect(self.rect.x + self.rect.width // 3,
                                      y,
                                      self.fact_rect.width * self.scale_factor,
                                      self.fact_rect.height * self.scale_factor)
         self.search_rect.center = self.rect.center
+        for frames in self.images.values():
+            frame_cache.preload(frames, self.scale_factor, self.rect.size)
+        self.frame_counts = {name: len(self.images[name]) for name in ANIMATION_NAMES if name in self.images}
+        # ещё не выровнен по центру и не проверял опору; какой кадр показан последним
+        self.fresh = True
+        self.shown = None
+        # искры от ударов и стрелы нужны уровню, пока на нём есть враги
+        assets.get('spark1')
+        if self.enemy_type == 'ranged':
+            assets.get('arrow')
         self.image = self.get_cropped_image(self.images[self.current_animation][self.animation_index])
 
         self.is_alive = True
@@ -222,148 +532,127 @@ class Enemy(pygame.sprite.Sprite):
         self.walking_auto_delay = random.randint(300, 800)
         self.walking_auto_timer = 0
 
-    def get_cropped_image(self, original_image):
-        
-        non_transparent_rect = original_image.get_bounding_rect()
-        
-        crop_width = non_transparent_rect.width
-        crop_height = non_transparent_rect.height
-
-        
-        crop_rect = pygame.Rect(
-            non_transparent_rect.x + (non_transparent_rect.width // 2) - (crop_width // 2),
-            non_transparent_rect.y + (non_transparent_rect.height // 2) - (crop_height // 2),
-            crop_width,
-            crop_height
-        )
-
-        
-        cropped_image = pygame.Surface((crop_width, crop_height), pygame.SRCALPHA)
-
-        
-        cropped_image.blit(original_image, (0, 0), crop_rect)
-
-        
-        scaled_image = pygame.transform.scale(cropped_image,
-                                              (int(crop_width * self.scale_factor),
-                                               int(crop_height * self.scale_factor)))
-
-        
-        centered_image = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-
-        x_pos = (self.rect.width - scaled_image.get_width()) // 2  
-
-        if self.current_animation == 'death':
-            
-            y_pos = self.rect.height - scaled_image.get_height()
-        else:
-            
-            y_pos = (self.rect.height - scaled_image.get_height()) // 2
-        y_pos = self.rect.height - scaled_image.get_height()
-
-        
-        centered_image.blit(scaled_image, (x_pos, y_pos))
-
-        return centered_image
+    def get_cropped_image(self, original_image, flip=False, alpha=255):
+        return frame_cache.get(original_image, self.scale_factor, self.rect.size, flip=flip, alpha=alpha)
 
     def update(self):
-        self.check_health()
-        if self.is_alive:
+        # один тик врага вне массивов группы, шаги и их порядок как в EnemyGroup.update
+        if not self.is_alive or self.health <= 0:
+            self.check_health()
+            if not self.alive():
+                return
+        alive = self.is_alive
+        frame_counts = self.frame_counts
+        if alive:
             self.walk_auto()
             self.search_player()
             if not self.taking_hit:
                 if self.is_attacking:
                     self.attack_timer += self.animation_speed
                 else:
-                    
                     if not self.on_ground:
                         self.velocity_y += self.gravity
-                        if self.velocity_y > 0:
-                            if self.current_animation != 'fall':
-                                self.current_animation = 'fall'
-                                self.animation_index = 0
-                        else:
-                            if self.current_animation != 'jump':
-                                self.current_animation = 'jump'
-                                self.animation_index = 0
-                    elif self.velocity_x != 0:
-                        if self.current_animation != 'run':
-                            self.current_animation = 'run'
-                            self.animation_index = 0
+                        state = 'fall' if self.velocity_y > 0 else 'jump'
                     else:
-                        if self.current_animation != 'idle':
-                            self.current_animation = 'idle'
-                            self.animation_index = 0
-            else:
-                if self.current_animation == 'take_hit' and self.animation_index == len(SKELETON_TAKE_HIT) - 1:
-                    self.taking_hit = False
+                        state = 'run' if self.velocity_x != 0 else 'idle'
+                    if self.current_animation != state:
+                        self.current_animation = state
+                        self.animation_index = 0
+            elif (self.current_animation == 'take_hit' and
+                  self.animation_index == frame_counts['take_hit'] - 1):
+                self.taking_hit = False
         else:
             self.velocity_x = 0
-        if not self.is_alive or self.taking_hit:
-            if not self.on_ground:
-                self.velocity_y += self.gravity
-
-        self.real_rect.x += self.velocity_x
-        self._check_collisions('horizontal')
-
-        self.real_rect.y += self.velocity_y
-        self._check_collisions('vertical')
-        self.rect.center = self.real_rect.center
-        self.search_rect.center = self.real_rect.center
+        if (not alive or self.taking_hit) and not self.on_ground:
+            self.velocity_y += self.gravity
 
+        self.move()
         self.update_animation()
-        self._check_ground()
-        self.spawn_object()
+        shown = (self.current_animation, self.animation_index, self.direction == -1, self.current_alpha)
+        if shown != self.shown:
+            self.show_frame()
+            self.shown = shown
+        if (alive and self.enemy_type == 'ranged' and self.need_obj and self.current_animation == 'attack' and
+                self.animation_index == frame_counts['attack'] - 2):
+            arrows.spawn(*self.real_rect.midright, self.direction, self.damage)
+            self.need_obj = False
 
     def walk_auto(self):
         self.walking_auto_timer += 1
-        if 0 < self.walking_auto_timer - self.walking_auto_delay < 60:
-            if self.walking_auto_timer - self.walking_auto_delay == 59:
+        phase = self.walking_auto_timer - self.walking_auto_delay
+        if 0 < phase < 60:
+            if phase == 59:
                 self.walking_auto_timer = 0
                 self.direction *= -1
-                print(self.direction)
-            self.move_x(5 * self.direction)
+            self.velocity_x = 5 * self.direction
         else:
-            self.move_x(0)
+            self.velocity_x = 0
 
     def search_player(self):
-        if self.player.get_sprites():
-            player = self.player.get_sprites()[0]
-            if player.is_alive and self.search_rect.colliderect(player.real_rect):
-                if not self.rect.colliderect(player.real_rect):
-                    direction = 1 if player.real_rect.centerx > self.search_rect.centerx else -1
-                    self.move_x(4 * direction)
+        hero = next(iter(self.player), None)
+        if hero is None or not hero.is_alive:
+            return
+        target = hero.real_rect
+        if not self.search_rect.colliderect(target):
+            return
+        if self.rect.colliderect(target):
+            if self.attack() == "continued":
+                spark_emitter.emit(target.centerx, target.centery)
+                hero.take_hit(self.damage)
+        else:
+            self.velocity_x = 4 if target.centerx > self.search_rect.centerx else -4
+
+    def move(self):
+        # как EnemyGroup.move: сдвиг с округлением, затем упор в первую задетую клетку карты
+        tiles = self.sprite_group
+        real_rect = self.real_rect
+        x, y = real_rect.topleft
+        if self.velocity_x != 0:
+            real_rect.x += self.velocity_x
+            cell = tiles.get_first_colliding_cell(real_rect)
+            if cell is not None:
+                if self.velocity_x > 0:
+                    real_rect.right = cell[0] * tiles.cell_width
                 else:
-                    if self.attack() == "continued":
-                        Particle(player.real_rect.centerx, player.real_rect.centery, "spark1")
-                        player.take_hit(self.damage)
-
-    def _check_collisions(self, direction):
-        for sprite in self.sprite_group:
-            if self.real_rect.colliderect(sprite.rect):
-                if direction == 'horizontal':
-                    if self.velocity_x > 0:  
-                        self.real_rect.right = sprite.rect.left
-                    elif self.velocity_x < 0:  
-                        self.real_rect.left = sprite.rect.right
-                    self.velocity_x = 0
-
-                elif direction == 'vertical':
-                    if self.velocity_y > 0:  
-                        self.real_rect.bottom = sprite.rect.top
-                        self.on_ground = True
-                    elif self.velocity_y < 0:  
-                        self.real_rect.top = sprite.rect.bottom
-                    self.velocity_y = 0
-
-    def _check_ground(self):
-        temp_rect = self.real_rect.copy()
-        temp_rect.y += 2
-        self.on_ground = False
-        for sprite in self.sprite_group:
-            if temp_rect.colliderect(sprite.rect):
-                self.on_ground = True
-                break
+                    real_rect.left = (cell[0] + 1) * tiles.cell_width
+                self.velocity_x = 0
+        if self.velocity_y != 0:
+            real_rect.y += self.velocity_y
+            cell = tiles.get_first_colliding_cell(real_rect)
+            if cell is not None:
+                if self.velocity_y > 0:
+                    real_rect.bottom = cell[1] * tiles.cell_height
+                else:
+                    real_rect.top = (cell[1] + 1) * tiles.cell_height
+                self.velocity_y = 0
+        if real_rect.topleft == (x, y) and not self.fresh:
+            return
+        self.fresh = False
+        self.rect.center = real_rect.center
+        self.search_rect.center = real_rect.center
+        self.on_ground = tiles.get_first_colliding_cell(real_rect.move(0, 2)) is not None
+
+    def update_animation(self):
+        self.animation_timer += self.animation_speed
+        if self.animation_timer >= 10:
+            self.animation_timer = 0
+            # у мёртвого анимация смерти останавливается на последнем кадре
+            if self.is_alive or self.animation_index != self.frame_counts['death'] - 1:
+                self.animation_index += 1
+            self.attack_timer = 0
+            if self.animation_index >= self.frame_counts.get(self.current_animation, 0):
+                if self.is_attacking:
+                    self.is_attacking = False
+                    self.current_animation = 'idle'
+                self.animation_index = 0
+        if self.velocity_x < 0:
+            self.direction = -1
+        elif self.velocity_x > 0:
+            self.direction = 1
+
+    def show_frame(self):
+        self.image = self.get_cropped_image(self.images[self.current_animation][self.animation_index],
+                                            self.direction == -1, self.current_alpha)
 
     def check_health(self):
         if self.health <= 0 and self.is_alive:
@@ -384,50 +673,6 @@ class Enemy(pygame.sprite.Sprite):
         elif self.is_expired:
             self.kill()
 
-    def spawn_object(self):
-        if self.enemy_type == 'ranged':
-            if self.need_obj and self.current_animation == 'attack' and self.animation_index == len(
-                    self.images[self.current_animation]) - 2 and self.is_alive:
-                Arrow(self.real_rect.midright[0], self.real_rect.midright[1], self.sprite_group, self.player,
-                      self.direction, self.damage)
-                self.need_obj = False
-
-    def update_animation(self):
-        self.animation_timer += self.animation_speed
-        if self.animation_timer >= 10:
-            self.animation_timer = 0
-            if self.is_alive:
-                self.animation_index += 1
-            else:
-                if not self.animation_index == len(self.images['death']) - 1:
-                    self.animation_index += 1
-            self.attack_timer = 0
-            if self.animation_index >= len(self.images[self.current_animation]):
-                if self.is_attacking:
-                    self.is_attacking = False
-                    self.current_animation = 'idle'
-                self.animation_index = 0
-
-        self.image = self.get_cropped_image(self.images[self.current_animation][self.animation_index])
-        self.image.set_alpha(self.current_alpha)
-
-        self.change_direction()
-
-    def change_direction(self):
-        if self.velocity_x < 0:
-            self.direction = -1
-        elif self.velocity_x > 0:
-            self.direction = 1
-        if self.direction == -1:  
-            
-            self.image = pygame.transform.flip(self.image, True, False)  
-        elif self.direction == 1:  
-            self.image = pygame.transform.flip(self.image, False, False)  
-
-    def move_x(self, dx):
-        if self.is_alive:
-            self.velocity_x = dx
-
     def take_hit(self, damage):
         if self.is_alive:
             self.current_animation = 'take_hit'
@@ -435,8 +680,9 @@ class Enemy(pygame.sprite.Sprite):
                 self.animation_index = 0
                 self.animation_timer = 0
                 self.taking_hit = True
-            DamageText(self.real_rect.centerx, self.real_rect.centery, damage)
+            damage_text_pool.spawn(self.real_rect.centerx, self.real_rect.centery, damage)
             self.health -= damage
+            activity.wake(self)
 
     def attack(self):
         if self.on_ground and not self.is_attacking and not self.taking_hit and self.is_alive:
@@ -464,6 +710,9 @@ class Enemy(pygame.sprite.Sprite):
 
 
 def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
     player = Enemy(300, 700, sprite_group=SpriteGroup(), images=skeleton_images)
 
     running = True
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import mmap
+import os
+from collections import OrderedDict
+
+import pygame
+
+FRAME_CACHE_LIMIT = 256 * 1024 * 1024
+FRAME_STORE_DIR = "cache/frames"
+FRAME_STORE_VERSION = 1
+FRAME_MANIFEST = "sources.json"
+
+
+def bake_frame(original_image, scale_factor, size, anchor="midbottom", crop=True):
+    # обрезаем прозрачные края, масштабируем и ставим кадр в прямоугольник сущности
+    if crop:
+        non_transparent_rect = original_image.get_bounding_rect()
+        cropped_image = pygame.Surface(non_transparent_rect.size, pygame.SRCALPHA)
+        cropped_image.blit(original_image, (0, 0), non_transparent_rect)
+    else:
+        cropped_image = original_image
+
+    scaled_image = pygame.transform.scale(cropped_image,
+                                          (int(cropped_image.get_width() * scale_factor),
+                                           int(cropped_image.get_height() * scale_factor)))
+
+    centered_image = pygame.Surface(size, pygame.SRCALPHA)
+
+    x_pos = (size[0] - scaled_image.get_width()) // 2
+    if anchor == "center":
+        y_pos = (size[1] - scaled_image.get_height()) // 2
+    else:
+        y_pos = size[1] - scaled_image.get_height()
+
+    centered_image.blit(scaled_image, (x_pos, y_pos))
+
+    return centered_image
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class SourceImage:
+    # исходная картинка кадра: хеш известен сразу, а PNG декодируется только при первом обращении к surface,
+    # то есть когда обработанного кадра нет на диске или нужна сама картинка
+    def __init__(self, loader, digest=None):
+        self.loader = loader
+        self.digest = digest
+        self.image = None
+
+    @property
+    def surface(self):
+        if self.image is None:
+            self.image = self.loader()
+        return self.image
+
+
+class SourceManifest:
+    # путь исходника -> время изменения, размер и хеш; пока файл не менялся, он не читается и не хешируется
+    def __init__(self, path):
+        self.path = path
+        self.entries = None
+        self.changed = False
+
+    def load(self):
+        self.entries = {}
+        try:
+            with open(self.path, 'r') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return
+        if metadata.get('version') == FRAME_STORE_VERSION:
+            self.entries = metadata['sources']
+
+    def digest(self, path):
+        if self.entries is None:
+            self.load()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+        digest = file_digest(path)
+        self.entries[path] = [stat.st_mtime_ns, stat.st_size, digest]
+        self.changed = True
+        return digest
+
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'version': FRAME_STORE_VERSION, 'sources': self.entries}, f)
+            os.replace(temp_path, self.path)
+            self.changed = False
+        except OSError:
+            pass
+
+
+def scaled_size(frame_size, scale_factor):
+    # прямоугольник сущности под кадр: дробная часть отбрасывается, как в pygame.Rect
+    return int(frame_size[0] * scale_factor), int(frame_size[1] * scale_factor)
+
+
+class FrameStore:
+    # обработанные кадры на диске: сырые пиксели BGRA, имя файла - хеш исходника и параметров обработки
+    def __init__(self, directory=FRAME_STORE_DIR):
+        self.directory = directory
+        self.manifest = SourceManifest(os.path.join(directory, FRAME_MANIFEST))
+        self.hits = 0
+        self.writes = 0
+
+    def get_path(self, original_image, scale_factor, size, anchor, crop):
+        digest = getattr(original_image, 'digest', None)
+        if digest is None:
+            return None
+        return self.frame_path(digest, scale_factor, size, anchor, crop)
+
+    def frame_path(self, digest, scale_factor, size, anchor, crop):
+        params = f"{digest}|{scale_factor}|{size[0]}x{size[1]}|{anchor}|{crop}|{FRAME_STORE_VERSION}"
+        return os.path.join(self.directory, hashlib.sha1(params.encode()).hexdigest() + ".bgra")
+
+    def load(self, path, size):
+        try:
+            with open(path, 'rb') as f:
+                # копия при записи: страницы читаются с диска по мере надобности, файл не меняется
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return None
+        if len(buffer) != size[0] * size[1] * 4:
+            return None
+        self.hits += 1
+        return pygame.image.frombuffer(buffer, size, "BGRA")
+
+    def save(self, path, frame):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(pygame.image.tobytes(frame, "BGRA"))
+            os.replace(temp_path, path)
+            self.writes += 1
+        except OSError:
+            pass
+
+
+class FrameCache:
+    def __init__(self, max_bytes=FRAME_CACHE_LIMIT, store=None):
+        self.max_bytes = max_bytes
+        self.store = store
+        self.frames = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, original_image, scale_factor, size, anchor="midbottom", crop=True, flip=False, alpha=255):
+        key = (original_image, scale_factor, tuple(size), anchor, crop, flip, alpha)
+        frame = self.frames.get(key)
+        if frame is not None:
+            self.hits += 1
+            self.frames.move_to_end(key)
+            return frame
+
+        self.misses += 1
+        if alpha < 255:
+            # полупрозрачный вариант делаем из уже отражённого кадра
+            frame = self.get(original_image, scale_factor, size, anchor, crop, flip).copy()
+            frame.set_alpha(alpha)
+        elif flip:
+            frame = pygame.transform.flip(self.get(original_image, scale_factor, size, anchor, crop), True, False)
+        else:
+            frame = self.bake(original_image, scale_factor, size, anchor, crop)
+        self._store(key, frame)
+        return frame
+
+    def bake(self, original_image, scale_factor, size, anchor, crop):
+        path = None
+        if self.store is not None:
+            path = self.store.get_path(original_image, scale_factor, size, anchor, crop)
+            if path is not None:
+                frame = self.store.load(path, size)
+                if frame is not None:
+                    return frame
+        if isinstance(original_image, SourceImage):
+            original_image = original_image.surface
+        frame = bake_frame(original_image, scale_factor, size, anchor, crop)
+        if path is not None:
+            self.store.save(path, frame)
+        return frame
+
+    def preload(self, images, scale_factor, size, anchor="midbottom", crop=True, mirrored=True):
+        for image in images:
+            self.get(image, scale_factor, size, anchor, crop)
+            if mirrored:
+                self.get(image, scale_factor, size, anchor, crop, flip=True)
+
+    def _store(self, key, frame):
+        self.frames[key] = frame
+        self.size_bytes += frame.get_pitch() * frame.get_height()
+        while self.size_bytes > self.max_bytes and len(self.frames) > 1:
+            _, evicted = self.frames.popitem(last=False)
+            self.size_bytes -= evicted.get_pitch() * evicted.get_height()
+            self.evictions += 1
+
+    def discard(self, images):
+        # убираем все обработанные варианты выгруженных исходников
+        images = set(images)
+        for key in [key for key in self.frames if key[0] in images]:
+            frame = self.frames.pop(key)
+            self.size_bytes -= frame.get_pitch() * frame.get_height()
+
+    def clear(self):
+        self.frames.clear()
+        self.size_bytes = 0
+
+    def stats(self):
+        return {
+            'frames': len(self.frames),
+            'bytes': self.size_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'disk_hits': self.store.hits if self.store is not None else 0,
+            'disk_writes': self.store.writes if self.store is not None else 0
+        }
+
+
+frame_cache = FrameCache(store=FrameStore())
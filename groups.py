@@ -1,3 +1,6 @@
+import random
+
+import numpy as np
 import pygame
 
 
@@ -13,4 +16,196 @@ class SpriteGroup(pygame.sprite.Group):
         sprites = []
         for sprite in self:
             sprites.append(sprite)
-        return sprites
\ No newline at end of file
+        return sprites
+
+class TileGroup(SpriteGroup):
+    def __init__(self, cell_width, cell_height):
+        super().__init__()
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.grid = {}
+        self.solid_mask = None
+
+    def place(self, sprite, col, row):
+        # клетка берётся из карты уровня, а не из прямоугольника спрайта
+        self.grid.setdefault((col, row), []).append(sprite)
+        self.solid_mask = None
+
+    def empty(self):
+        self.grid = {}
+        self.solid_mask = None
+        super().empty()
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        for cell in self._cells(sprite.rect):
+            sprites = self.grid.get(cell)
+            if sprites and sprite in sprites:
+                sprites.remove(sprite)
+        self.solid_mask = None
+
+    def get_solid_mask(self):
+        # занятые клетки сетки массивом [строка, столбец] с пустой рамкой в одну клетку,
+        # чтобы клетки за краем карты можно было читать без проверок
+        if self.solid_mask is None:
+            cells = [cell for cell, sprites in self.grid.items() if sprites]
+            cols = max((col for col, _ in cells), default=-1) + 1
+            rows = max((row for _, row in cells), default=-1) + 1
+            self.solid_mask = np.zeros((rows + 2, cols + 2), dtype=bool)
+            if cells:
+                cols, rows = zip(*cells)
+                self.solid_mask[np.array(rows) + 1, np.array(cols) + 1] = True
+        return self.solid_mask
+
+    def get_first_colliding_cells(self, left, top, width, height):
+        # для многих прямоугольников сразу: первая занятая клетка в порядке get_colliding,
+        # по строкам сверху вниз и слева направо
+        mask = self.get_solid_mask()
+        count = len(left)
+        left_col = left // self.cell_width
+        right_col = (left + width - 1) // self.cell_width
+        top_row = top // self.cell_height
+        bottom_row = (top + height - 1) // self.cell_height
+        if not count:
+            return np.zeros(0, dtype=bool), left_col, top_row
+        # лишние клетки за краем прямоугольника повторяют последнюю и идут после неё, первую не меняют
+        row_span = int((bottom_row - top_row).max()) + 1
+        col_span = int((right_col - left_col).max()) + 1
+        row = np.minimum(top_row[:, None] + np.arange(row_span), bottom_row[:, None])
+        col = np.minimum(left_col[:, None] + np.arange(col_span), right_col[:, None])
+        hits = mask[np.minimum(np.maximum(row, -1), mask.shape[0] - 2)[:, :, None] + 1,
+                    np.minimum(np.maximum(col, -1), mask.shape[1] - 2)[:, None, :] + 1].reshape(count, -1)
+        first = hits.argmax(axis=1)
+        return hits.any(axis=1), left_col + first % col_span, top_row + first // col_span
+
+    def get_first_colliding_cell(self, rect):
+        # то же для одного прямоугольника, без массивов: (столбец, строка) или None
+        for cell in self._cells(rect):
+            if self.grid.get(cell):
+                return cell
+        return None
+
+    def get_colliding_mask(self, left, top, width, height):
+        return self.get_first_colliding_cells(left, top, width, height)[0]
+
+    def get_colliding(self, rect):
+        colliding = []
+        for cell in self._cells(rect):
+            for sprite in self.grid.get(cell, ()):
+                if rect.colliderect(sprite.rect) and sprite not in colliding:
+                    colliding.append(sprite)
+        return colliding
+
+    def _cells(self, rect):
+        left = rect.left // self.cell_width
+        right = (rect.right - 1) // self.cell_width
+        top = rect.top // self.cell_height
+        bottom = (rect.bottom - 1) // self.cell_height
+        return [(col, row) for row in range(top, bottom + 1) for col in range(left, right + 1)]
+
+
+class SpatialHash:
+    def __init__(self, cell_size, margin=32):
+        self.cell_size = cell_size
+        # запас на движение сущностей между перестройками
+        self.margin = margin
+        self.cells = {}
+        self.order = {}
+
+    def rebuild(self, *groups):
+        self.cells = {}
+        self.order = {}
+        for group in groups:
+            for sprite in group:
+                self.insert(sprite)
+
+    def insert(self, sprite):
+        self.order[sprite] = len(self.order)
+        for cell in self._cells(sprite.real_rect.inflate(self.margin * 2, self.margin * 2)):
+            self.cells.setdefault(cell, []).append(sprite)
+
+    def query(self, rect, group=None):
+        found = set()
+        for cell in self._cells(rect):
+            for sprite in self.cells.get(cell, ()):
+                if sprite in found or not rect.colliderect(sprite.real_rect):
+                    continue
+                if group.has(sprite) if group is not None else sprite.alive():
+                    found.add(sprite)
+        return sorted(found, key=self.order.get)
+
+    def _cells(self, rect):
+        left = rect.left // self.cell_size
+        right = (rect.right - 1) // self.cell_size
+        top = rect.top // self.cell_size
+        bottom = (rect.bottom - 1) // self.cell_size
+        return [(col, row) for row in range(top, bottom + 1) for col in range(left, right + 1)]
+
+
+class PooledSprite(pygame.sprite.Sprite):
+    # пул назначается классу при создании SpritePool
+    pool = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.in_pool = False
+        self.pool.track(self)
+        self.reset(*args, **kwargs)
+
+    def reset(self, *args, **kwargs):
+        # подкласс заново задаёт здесь всё состояние спрайта, и при создании, и при выдаче из пула
+        pass
+
+    def kill(self):
+        super().kill()
+        self.pool.release(self)
+
+
+class SpritePool:
+    def __init__(self, sprite_class):
+        self.sprite_class = sprite_class
+        sprite_class.pool = self
+        self.instances = []
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def track(self, sprite):
+        self.instances.append(sprite)
+        self.created += 1
+
+    def spawn(self, *args, **kwargs):
+        if not self.free:
+            return self.sprite_class(*args, **kwargs)
+        sprite = self.free.pop()
+        sprite.in_pool = False
+        sprite.reset(*args, **kwargs)
+        self.reused += 1
+        return sprite
+
+    def release(self, sprite):
+        if not sprite.in_pool:
+            sprite.in_pool = True
+            self.free.append(sprite)
+
+    def reclaim(self):
+        # group.empty() не вызывает kill, такие спрайты возвращаются в пул здесь
+        for sprite in self.instances:
+            if not sprite.alive():
+                self.release(sprite)
+
+    def prewarm(self, count, *args, **kwargs):
+        # заготовки не должны сдвигать общий генератор случайных чисел
+        state = random.getstate()
+        # создаются только недостающие экземпляры, свободные и занятые уже входят в счёт
+        sprites = [self.sprite_class(*args, **kwargs) for _ in range(count - len(self.instances))]
+        for sprite in sprites:
+            sprite.kill()
+        random.setstate(state)
+
+    def stats(self):
+        return {'instances': len(self.instances), 'free': len(self.free),
+                'created': self.created, 'reused': self.reused}
+
+
+entity_index = SpatialHash(256)
@@ -1,44 +1,35 @@
 import pygame
-from methods import load_image
 import random
 from groups import SpriteGroup
+from frames import frame_cache, scaled_size
+from assets import AnimationSet
 
-pygame.init()
 WIDTH, HEIGHT = 1920, 1080
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
 
-PLAYER_IDLE = [load_image(f"data/hero_idle/{x}.png") for x in range(1, 11)]
-PLAYER_RUN = [load_image(f"data/hero_run/{x}.png") for x in range(1, 11)]
-PLAYER_FALL = [load_image(f"data/hero_fall/{x}.png") for x in range(1, 4)]
-PLAYER_JUMP = [load_image(f"data/hero_jump/{x}.png") for x in range(1, 4)]
-PLAYER_TAKE_HIT = [load_image(f"data/hero_take_hit/{x}.png") for x in range(1, 4)]
-PLAYER_DEATH = [load_image(f"data/hero_death/{x}.png") for x in range(1, 11)]
-PLAYER_ATTACK1 = [load_image(f"data/hero_attack1/{x}.png") for x in range(1, 5)]
-PLAYER_ATTACK2 = [load_image(f"data/hero_attack2/{x}.png") for x in range(1, 7)]
-
-PLAYER_ATTACK1_NO = [load_image(f"data/hero_attack1_NoMovement/{x}.png") for x in range(1, 5)]
-PLAYER_ATTACK2_NO = [load_image(f"data/hero_attack2_NoMovement/{x}.png") for x in range(1, 7)]
+player_images = AnimationSet({
+    'idle': 'hero_idle',
+    'run': 'hero_run',
+    'fall': 'hero_fall',
+    'jump': 'hero_jump',
+    'take_hit': 'hero_take_hit',
+    'death': 'hero_death',
+    'attack1': 'hero_attack1_no',
+    'attack2': 'hero_attack2_no'
+})
 
 hero_group = SpriteGroup()
 
 
 class Player(pygame.sprite.Sprite):
+    # масштаб и размер кадра героя, по ним же build_assets.py заранее готовит кадры
+    scale_factor = 3
+    frame_size = (60, 38)
+
     def __init__(self, x, y, sprite_group, max_health=100):
         super().__init__(hero_group)
-        self.images = {
-            'idle': PLAYER_IDLE,
-            'run': PLAYER_RUN,
-            'fall': PLAYER_FALL,
-            'jump': PLAYER_JUMP,
-            'take_hit': PLAYER_TAKE_HIT,
-            'death': PLAYER_DEATH,
-            'attack1': PLAYER_ATTACK1_NO,
-            'attack2': PLAYER_ATTACK2_NO
-        }
+        self.images = player_images
         self.current_animation = 'idle'
         self.animation_index = 0
-        self.scale_factor = 3  
 
         self.sprite_group = sprite_group
 
@@ -46,20 +37,20 @@ class Player(pygame.sprite.Sprite):
         self.attack_timer = 0
         self.attacking_flag = False
 
-        self.original_rect = pygame.Rect(0, 0, 60, 38)  
+        self.original_rect = pygame.Rect((0, 0), self.frame_size)
         self.fact_rect = pygame.Rect(0, 0, 20, 38)
 
         x = x - self.fact_rect.width - 50
         y = y - self.fact_rect.height - 12
 
-        self.rect = pygame.Rect(x, y,
-                                self.original_rect.width * self.scale_factor,
-                                self.original_rect.height * self.scale_factor)
+        self.rect = pygame.Rect((x, y), scaled_size(self.frame_size, self.scale_factor))
 
         self.real_rect = pygame.Rect(self.rect.x + self.rect.width // 3,
                                      y,
                                      self.fact_rect.width * self.scale_factor,
                                      self.fact_rect.height * self.scale_factor)
+        for frames in self.images.values():
+            frame_cache.preload(frames, self.scale_factor, self.rect.size)
         self.image = self.get_cropped_image(self.images[self.current_animation][self.animation_index])
 
         self.is_alive = True
@@ -80,43 +71,8 @@ class Player(pygame.sprite.Sprite):
 
         self.direction = 1
 
-    def get_cropped_image(self, original_image):
-        
-        non_transparent_rect = original_image.get_bounding_rect()
-        
-        crop_width = non_transparent_rect.width
-        crop_height = non_transparent_rect.height
-
-        
-        crop_rect = pygame.Rect(
-            non_transparent_rect.x + (non_transparent_rect.width // 2) - (crop_width // 2),
-            non_transparent_rect.y + (non_transparent_rect.height // 2) - (crop_height // 2),
-            crop_width,
-            crop_height
-        )
-
-        
-        cropped_image = pygame.Surface((crop_width, crop_height), pygame.SRCALPHA)
-
-        
-        cropped_image.blit(original_image, (0, 0), crop_rect)
-
-        
-        scaled_image = pygame.transform.scale(cropped_image,
-                                              (int(crop_width * self.scale_factor),
-                                               int(crop_height * self.scale_factor)))
-
-        
-        centered_image = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-
-        
-        x_pos = (self.rect.width - scaled_image.get_width()) // 2  
-        y_pos = self.rect.height - scaled_image.get_height()
-
-        
-        centered_image.blit(scaled_image, (x_pos, y_pos))
-
-        return centered_image
+    def get_cropped_image(self, original_image, flip=False):
+        return frame_cache.get(original_image, self.scale_factor, self.rect.size, flip=flip)
 
     def check_health(self):
         if self.health <= 0 and self.is_alive:
@@ -155,7 +111,7 @@ class Player(pygame.sprite.Sprite):
                             self.current_animation = 'idle'
                             self.animation_index = 0
             else:
-                if self.current_animation == 'take_hit' and self.animation_index == len(PLAYER_TAKE_HIT) - 1:
+                if self.current_animation == 'take_hit' and self.animation_index == len(self.images['take_hit']) - 1:
                     self.taking_hit = False
         else:
             self.velocity_x = 0
@@ -182,7 +138,7 @@ class Player(pygame.sprite.Sprite):
                 self.endurance += self.endurance_regen
 
     def _check_collisions(self, direction):
-        for sprite in self.sprite_group:
+        for sprite in self.sprite_group.get_colliding(self.real_rect):
             if self.real_rect.colliderect(sprite.rect):
                 if direction == 'horizontal':
                     if self.velocity_x > 0:  
@@ -203,11 +159,7 @@ class Player(pygame.sprite.Sprite):
         
         temp_rect = self.real_rect.copy()
         temp_rect.y += 2
-        self.on_ground = False
-        for sprite in self.sprite_group:
-            if temp_rect.colliderect(sprite.rect):
-                self.on_ground = True
-                break
+        self.on_ground = bool(self.sprite_group.get_colliding(temp_rect))
 
     def update_animation(self):
         self.animation_timer += self.animation_speed
@@ -227,19 +179,15 @@ class Player(pygame.sprite.Sprite):
         if self.current_animation not in ('attack1', 'attack2'):
             self.is_attacking = False
 
-        
-        self.image = self.get_cropped_image(self.images[self.current_animation][self.animation_index])
         self.change_direction()
+        self.image = self.get_cropped_image(self.images[self.current_animation][self.animation_index],
+                                            self.direction == -1)
 
     def change_direction(self):
         if self.velocity_x < 0:
             self.direction = -1
         elif self.velocity_x > 0:
             self.direction = 1
-        if self.direction == -1:  
-            self.image = pygame.transform.flip(self.image, True, False)  
-        elif self.direction == 1:  
-            self.image = pygame.transform.flip(self.image, False, False)  
 
     def move_x(self, dx):
         if self.is_alive:
@@ -278,6 +226,9 @@ class Player(pygame.sprite.Sprite):
 
 
 def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
     player = Player(300, 700, max_health=100)
 
     running = True
@@ -1,19 +1,11 @@
 import os
 
 import pygame
-from methods import load_image
+from assets import assets
 
 SPACING = 10
 FONT_PATH = "fonts/monogram.ttf"
 
-ITEM_BOX = load_image("interface/item_box_border.png")
-ITEM_BOX_PATTERN = load_image("interface/item_box_pattern.png")
-VALUE_BAR = load_image("interface/value_bar.png")
-
-ARMOR_ICON = load_image("interface/armor_icon.png")
-DAMAGE_ICON = load_image("interface/damage_icon.png")
-STAMINA_ICON = load_image("interface/stamina_icon.png")
-
 
 class Bar:
     def __init__(self, screen, x, y, max_value, name, width=200, height=20,
@@ -36,6 +28,10 @@ class Bar:
         self.animation_speed = 0.5
         self.font = pygame.font.Font(FONT_PATH, 24)
         self.name_font = pygame.font.Font(FONT_PATH, 36)
+        self.name_surface = self.name_font.render(self.name, True, (255, 255, 255))
+        # готовая картинка полосы и то, для чего она нарисована
+        self.surface = None
+        self.surface_state = None
 
     def update(self, current_value):
         self.current_value = max(0, min(current_value, self.max_value))
@@ -43,32 +39,44 @@ class Bar:
 
     def draw(self):
         progress = self.display_value / self.max_value
-        self._draw_bar(progress)
+        rect = self.get_rect()
+        state = (int(self.width * progress), self._get_text(progress))
+        if state != self.surface_state:
+            self.surface = self._draw_bar(progress, rect)
+            self.surface_state = state
+        self.screen.blit(self.surface, rect)
 
-    def _draw_bar(self, progress):
-        
-        bg_rect = pygame.Rect(self.x, self.y, self.width, self.height)
-        pygame.draw.rect(self.screen, self.background_color, bg_rect)
+    def _draw_bar(self, progress, rect):
+        surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+        x = self.x - rect.x
+        y = self.y - rect.y
+
+        bg_rect = pygame.Rect(x, y, self.width, self.height)
+        pygame.draw.rect(surface, self.background_color, bg_rect)
 
         
         filled_width = self.width * progress
-        fill_rect = pygame.Rect(self.x, self.y, filled_width, self.height)
-        pygame.draw.rect(self.screen, self.foreground_color, fill_rect)
+        fill_rect = pygame.Rect(x, y, filled_width, self.height)
+        pygame.draw.rect(surface, self.foreground_color, fill_rect)
 
         
-        border_rect = pygame.Rect(self.x, self.y, self.width, self.height)
-        pygame.draw.rect(self.screen, self.border_color, border_rect, 2)
+        border_rect = pygame.Rect(x, y, self.width, self.height)
+        pygame.draw.rect(surface, self.border_color, border_rect, 2)
 
         
         text = self._get_text(progress)
         text_surface = self.font.render(text, True, (255, 255, 255))
-        text_rect = text_surface.get_rect(center=(self.x + self.width / 2, self.y + self.height / 2))
-        self.screen.blit(text_surface, text_rect)
+        text_rect = text_surface.get_rect(center=(x + self.width / 2, y + self.height / 2))
+        surface.blit(text_surface, text_rect)
+
+        text_rect = self.name_surface.get_rect(center=(x + self.width / 2, y - self.height))
+        surface.blit(self.name_surface, text_rect)
+        return surface
 
-        text_name = self.name
-        text_surface = self.name_font.render(text_name, True, (255, 255, 255))
-        text_rect = text_surface.get_rect(center=(self.x + self.width / 2, self.y - self.height))
-        self.screen.blit(text_surface, text_rect)
+    def get_rect(self):
+        # полоса вместе с подписью над ней
+        return pygame.Rect(self.x - SPACING, self.y - self.height * 2 - SPACING,
+                           self.width + SPACING * 2, self.height * 3 + SPACING * 2)
 
     def _get_text(self, progress):
         return f"{int(progress * 100)}%"
@@ -93,16 +101,24 @@ class StaminaBar(Bar):
 class CoinCounter:
     def __init__(self, x, y, font_size=60):
         self.coin_count = 0
+        self.text_width = 0
         self.font = pygame.font.Font("fonts/monogram.ttf", font_size)
         self.position = (x, y)
         self.coin_image = pygame.image.load("interface/coin.png")
         self.coin_image = pygame.transform.scale(self.coin_image, (70, 70))
+        self.count_text = None
 
     def draw(self, screen, count):
-        self.coin_count = count
+        # число перерисовывается только когда меняется количество монет
+        if self.count_text is None or count != self.coin_count:
+            self.coin_count = count
+            self.count_text = self.font.render(str(self.coin_count), True, (255, 255, 255))
+            self.text_width = self.count_text.get_width()
         screen.blit(self.coin_image, self.position)
-        count_text = self.font.render(str(self.coin_count), True, (255, 255, 255))
-        screen.blit(count_text, (self.position[0] + 80, self.position[1] + 10))
+        screen.blit(self.count_text, (self.position[0] + 80, self.position[1] + 10))
+
+    def get_rect(self):
+        return pygame.Rect(self.position, (80 + max(self.text_width, 200), self.coin_image.get_height()))
 
 
 class ShopMenu:
@@ -120,26 +136,29 @@ class ShopMenu:
 
         self.border_width = 3
         self.item_size = self.screen.get_height() // 6
-        self.item_image = pygame.transform.scale(ITEM_BOX, (self.item_size, self.item_size))
-        self.item_pattern = pygame.transform.scale(ITEM_BOX_PATTERN, (
-            ITEM_BOX_PATTERN.get_width() * self.item_size // ITEM_BOX_PATTERN.get_width(),
-            ITEM_BOX_PATTERN.get_height() * self.item_size // ITEM_BOX_PATTERN.get_width()))
-
-        self.value_bar_image = pygame.transform.scale(VALUE_BAR, (
-            VALUE_BAR.get_width() * self.item_size // VALUE_BAR.get_width(),
-            VALUE_BAR.get_height() * self.item_size // VALUE_BAR.get_width()))
-
-        self.damage_icon = pygame.transform.scale(DAMAGE_ICON, (
-            VALUE_BAR.get_width() * self.item_size // VALUE_BAR.get_width(),
-            VALUE_BAR.get_width() * self.item_size // VALUE_BAR.get_width()))
-
-        self.armor_icon = pygame.transform.scale(ARMOR_ICON, (
-            VALUE_BAR.get_width() * self.item_size // VALUE_BAR.get_width(),
-            VALUE_BAR.get_width() * self.item_size // VALUE_BAR.get_width()))
-
-        self.stamina_icon = pygame.transform.scale(STAMINA_ICON, (
-            VALUE_BAR.get_width() * self.item_size // VALUE_BAR.get_width(),
-            VALUE_BAR.get_width() * self.item_size // VALUE_BAR.get_width()))
+        item_box = assets.image('item_box')
+        item_box_pattern = assets.image('item_box_pattern')
+        value_bar = assets.image('value_bar')
+        self.item_image = pygame.transform.scale(item_box, (self.item_size, self.item_size))
+        self.item_pattern = pygame.transform.scale(item_box_pattern, (
+            item_box_pattern.get_width() * self.item_size // item_box_pattern.get_width(),
+            item_box_pattern.get_height() * self.item_size // item_box_pattern.get_width()))
+
+        self.value_bar_image = pygame.transform.scale(value_bar, (
+            value_bar.get_width() * self.item_size // value_bar.get_width(),
+            value_bar.get_height() * self.item_size // value_bar.get_width()))
+
+        self.damage_icon = pygame.transform.scale(assets.image('damage_icon'), (
+            value_bar.get_width() * self.item_size // value_bar.get_width(),
+            value_bar.get_width() * self.item_size // value_bar.get_width()))
+
+        self.armor_icon = pygame.transform.scale(assets.image('armor_icon'), (
+            value_bar.get_width() * self.item_size // value_bar.get_width(),
+            value_bar.get_width() * self.item_size // value_bar.get_width()))
+
+        self.stamina_icon = pygame.transform.scale(assets.image('stamina_icon'), (
+            value_bar.get_width() * self.item_size // value_bar.get_width(),
+            value_bar.get_width() * self.item_size // value_bar.get_width()))
 
         self.name_font = pygame.font.Font(FONT_PATH, 72)
         self.plus_font = pygame.font.Font(FONT_PATH, 60)
@@ -151,18 +170,19 @@ class ShopMenu:
         self.max_value = 4
         self.is_open = False
 
-        self.draw_menu()
+        self.plus_rects = []
+        self.surface_state = None
+        self.surface, self.surface_rect = self.render_menu()
 
-    def draw_slot(self, title, current_value, position, mouse_pos):
+    def draw_slot(self, target, title, current_value, position, hovered):
         
         image_rect = self.item_image.get_rect(center=position)
         pattern_rect = self.item_pattern.get_rect(midbottom=image_rect.midtop)
         bar_rect = self.value_bar_image.get_rect(midtop=(image_rect.centerx, image_rect.centery + image_rect.height))
-        print(image_rect.centerx, image_rect.centery)
 
         
-        self.screen.blit(self.item_image, image_rect)
-        self.screen.blit(self.item_pattern, pattern_rect)
+        target.blit(self.item_image, image_rect)
+        target.blit(self.item_pattern, pattern_rect)
         if title == "damage":
             icon = self.damage_icon
         elif title == "armor":
@@ -175,49 +195,58 @@ class ShopMenu:
             
         if icon:
             icon_rect = icon.get_rect(center=image_rect.center)  
-            self.screen.blit(icon, icon_rect)
+            target.blit(icon, icon_rect)
 
         text_surface = self.name_font.render(title, True, (255, 255, 255))
         text_rect = text_surface.get_rect(midtop=(image_rect.centerx, image_rect.centery + image_rect.height // 2))
-        self.screen.blit(text_surface, text_rect)
+        target.blit(text_surface, text_rect)
 
         text_surface2 = self.price_font.render("price: 250$", True, (255, 255, 255))
         text_rect2 = text_surface.get_rect(midtop=(image_rect.centerx, image_rect.centery + image_rect.height + 20))
-        self.screen.blit(text_surface2, text_rect2)
+        target.blit(text_surface2, text_rect2)
 
         
         fill_width = (current_value / self.max_value) * bar_rect.width - 2
         fill_rect = pygame.Rect(bar_rect.left + 2, bar_rect.top, fill_width, bar_rect.height)
-        pygame.draw.rect(self.screen, (0, 255, 0), fill_rect)
+        pygame.draw.rect(target, (0, 255, 0), fill_rect)
         
-        self.screen.blit(self.value_bar_image, bar_rect)
+        target.blit(self.value_bar_image, bar_rect)
 
         
         for i in range(1, 4):
             line_x = bar_rect.left + (bar_rect.width / 4) * i
-            pygame.draw.line(self.screen, (255, 255, 255), (line_x, bar_rect.top), (line_x, bar_rect.bottom), 3)
+            pygame.draw.line(target, (255, 255, 255), (line_x, bar_rect.top), (line_x, bar_rect.bottom), 3)
 
         
-        plus_text = self.plus_font.render("+", True, (255, 255, 255))
+        plus_text = self.plus_font.render("+", True, (255, 255, 0) if hovered else (255, 255, 255))
         plus_rect = plus_text.get_rect(midright=(bar_rect.left, bar_rect.centery))
-
-        
-        if plus_rect.collidepoint(mouse_pos):
-            plus_text = self.plus_font.render("+", True, (255, 255, 0))  
-
-        self.screen.blit(plus_text, plus_rect)
+        target.blit(plus_text, plus_rect)
         return plus_rect
 
     def draw_menu(self):
+        # меню перерисовывается, только когда купили улучшение или курсор перешёл на другой "+"
+        mouse_pos = pygame.mouse.get_pos()
+        hovered = None
+        for i, plus_rect in enumerate(self.plus_rects):
+            if plus_rect.collidepoint(mouse_pos):
+                hovered = i
+        state = (self.current_value_damage, self.current_value_armor, self.current_value_stamina, hovered)
+        if state != self.surface_state:
+            self.surface, self.surface_rect = self.render_menu(hovered)
+            self.surface_state = state
+        self.screen.blit(self.surface, self.surface_rect)
+
+    def render_menu(self, hovered=None):
+        target = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
         self.bg_rect = pygame.Rect(0, 0, self.screen.get_width() / 2, self.screen.get_height() / 2)
         self.bg_rect.center = self.screen.get_rect().center
-        pygame.draw.rect(self.screen, self.background_color, self.bg_rect)
+        pygame.draw.rect(target, self.background_color, self.bg_rect)
 
         border_rect = pygame.Rect(0, 0, self.screen.get_width() / 2, self.screen.get_height() / 2)
         border_rect.center = self.screen.get_rect().center
-        pygame.draw.rect(self.screen, self.border_color, border_rect, self.border_width)
+        pygame.draw.rect(target, self.border_color, border_rect, self.border_width)
 
-        self.draw_close_button()
+        self.draw_close_button(target)
 
         
         slot_positions = [
@@ -227,18 +256,21 @@ class ShopMenu:
         ]
         self.plus_rects = []
         for i, title in enumerate(["damage", "armor", "stamina"]):
-            plus_rect = self.draw_slot(title, [self.current_value_damage, self.current_value_armor,
-                                               self.current_value_stamina][i], slot_positions[i],
-                                       pygame.mouse.get_pos())
+            plus_rect = self.draw_slot(target, title, [self.current_value_damage, self.current_value_armor,
+                                                       self.current_value_stamina][i], slot_positions[i],
+                                       hovered == i)
             self.plus_rects.append(plus_rect)
+        # на экран идёт только занятая меню часть
+        rect = target.get_bounding_rect()
+        return target.subsurface(rect).convert_alpha(), rect
 
-    def draw_close_button(self):
+    def draw_close_button(self, target):
         
         close_x = self.bg_rect.right - 40
         close_y = self.bg_rect.top + 10
         
-        pygame.draw.line(self.screen, (255, 0, 0), (close_x, close_y), (close_x + 20, close_y + 20), 3)  
-        pygame.draw.line(self.screen, (255, 0, 0), (close_x, close_y + 20), (close_x + 20, close_y), 3)  
+        pygame.draw.line(target, (255, 0, 0), (close_x, close_y), (close_x + 20, close_y + 20), 3)  
+        pygame.draw.line(target, (255, 0, 0), (close_x, close_y + 20), (close_x + 20, close_y), 3)  
 
     def get_attributes(self):
         return (self.damage_values[self.current_value_damage], self.armor_values[self.current_value_armor],
@@ -323,27 +355,47 @@ class MainMenu:
             
         ]
 
+        # прямоугольники кнопок и их картинки в обычном и подсвеченном виде считаются один раз
+        self.button_rects = []
+        self.button_surfaces = []
+        for text, (x, y) in zip(self.menu_items, self.button_positions):
+            rect = self.get_button_rect(text, x, y)
+            self.button_rects.append(rect)
+            self.button_surfaces.append((self.render_button(text, rect, False), self.render_button(text, rect, True)))
+
     def draw_text(self, text, x, y):
         textobj = self.font.render(text, True, (0, 0, 0))
         textrect = textobj.get_rect(center=(x, y))  
         return textobj, textrect
 
-    def draw_button(self, text, x, y, active):
-        
+    def get_button_rect(self, text, x, y):
+        width = self.font.size(text)[0] + 20
+        height = self.font.get_height() + 10
+        return pygame.Rect(x - width // 2, y - height // 2, width, height)
+
+    def render_button(self, text, bg_rect, active):
+        # поверхность в формате экрана, чтобы фон кнопки выглядел так же, как при рисовании прямо на экран
+        surface = pygame.Surface(bg_rect.size).convert(self.screen)
         bg_color = self.button_bg_color if active else self.button_bg_color_inactive
-        bg_rect = pygame.Rect(x - (self.font.size(text)[0] + 20) // 2, y - (self.font.get_height() + 10) // 2,
-                              self.font.size(text)[0] + 20, self.font.get_height() + 10)
-        pygame.draw.rect(self.screen, bg_color, bg_rect)
+        pygame.draw.rect(surface, bg_color, surface.get_rect())
 
         
-        textobj, textrect = self.draw_text(text, bg_rect.centerx,
-                                           bg_rect.centery)  
-        self.screen.blit(textobj, textrect)
+        textobj, textrect = self.draw_text(text, bg_rect.width // 2,
+                                           bg_rect.height // 2)  
+        surface.blit(textobj, textrect)
+        return surface
+
+    def get_hovered_button(self, pos):
+        for i, rect in enumerate(self.button_rects):
+            if rect.left <= pos[0] <= rect.right and rect.top <= pos[1] <= rect.bottom:
+                return i
+        return None
+
+    def draw_buttons(self, mouse_pos):
+        hovered = self.get_hovered_button(mouse_pos)
+        for i, (rect, surfaces) in enumerate(zip(self.button_rects, self.button_surfaces)):
+            self.screen.blit(surfaces[i == hovered], rect)
 
     def check_button_click(self, pos):
-        for i, (x, y) in enumerate(self.button_positions):
-            if x - (self.font.size(self.menu_items[i])[0] + 20) // 2 <= pos[0] <= x + (
-                    self.font.size(self.menu_items[i])[0] + 20) // 2 and \
-                    y - (self.font.get_height() + 10) // 2 <= pos[1] <= y + (self.font.get_height() + 10) // 2:
-                return i + 1  
-        return None
+        hovered = self.get_hovered_button(pos)
+        return None if hovered is None else hovered + 1
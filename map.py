@@ -1,15 +1,26 @@
 import json
 import random
+import sys
+import time
+from collections import OrderedDict
+
 import pygame
 
-from methods import load_image
+from methods import load_image, HEADLESS
 from hero import Player, hero_group
-from enemies import Enemy, skeleton_images, mushroom_images, archer_images, enemy_group, weapon_object_group
-from particles import particles_group
-from traps import trap_group, Fire, ElectricField, PoisonCloud, Shop, Tree, shop_group, Chest, Tombstone, Portal
-from groups import SpriteGroup
+from enemies import Enemy, skeleton_images, mushroom_images, archer_images, enemy_group
+from particles import spark_emitter
+from projectiles import arrows
+from activity import activity
+from traps import animation_clocks, trap_group, Fire, ElectricField, PoisonCloud, Shop, Tree, shop_group, Chest, Tombstone, Portal
+from groups import TileGroup, entity_index
 from interface import HealthBar, StaminaBar, ShopMenu, MainMenu, CoinCounter
-from damage_numbers import damage_text_group
+from damage_numbers import damage_text_group, damage_text_pool, money_text_pool
+from render import RenderQueue, DisplayPresenter
+from controls import FrameInput
+from replay import InputRecorder
+from profiler import FrameProfiler
+from assets import assets
 
 
 pygame.init()
@@ -26,11 +37,14 @@ GRASS_TILE = pygame.transform.scale(load_image("ground/2.png"), (64, 64))
 EARTH_TILE = pygame.transform.scale(load_image("ground/76.png"), (64, 64))
 TILES = {"-": GRASS_TILE, "#": EARTH_TILE}
 
+CHUNK_SIZE = 1024
+CHUNK_MEMORY_BUDGET = 64 * 1024 * 1024
+
 logo = pygame.image.load('logo/iron_knight_transparent.png')
 logo_rect = logo.get_rect(center=(screen_width // 2, 100))
 
 
-sprite_group = SpriteGroup()
+sprite_group = TileGroup(TILE_WIDTH, TILE_HEIGHT)
 
 enemy_damage = {
     1: {
@@ -52,6 +66,12 @@ enemy_damage = {
 
 levels = {1: "map/1.txt", 2: "map/2.txt", 3: "map/3.txt"}
 
+FPS = 60
+TICK_TIME = 1 / FPS
+MAX_TICKS_PER_FRAME = 5
+MAX_FRAME_TIME = 0.25
+SAVE_PATH = 'save/save_game.json'
+
 
 class Sprite(pygame.sprite.Sprite):
     def __init__(self, group):
@@ -69,6 +89,64 @@ class Tile(Sprite):
         self.rect = self.image.get_rect().move(TILE_WIDTH * pos_x, TILE_HEIGHT * pos_y)
 
 
+class TileChunks:
+    def __init__(self, tiles, chunk_size=CHUNK_SIZE, memory_budget=CHUNK_MEMORY_BUDGET):
+        self.tiles = tiles
+        self.chunk_size = chunk_size
+        self.memory_budget = memory_budget
+        self.chunks = OrderedDict()
+        self.size_bytes = 0
+
+    def clear(self):
+        self.chunks.clear()
+        self.size_bytes = 0
+
+    def get_chunk(self, col, row):
+        if (col, row) in self.chunks:
+            self.chunks.move_to_end((col, row))
+            return self.chunks[(col, row)]
+        chunk = self.build_chunk(col, row)
+        self.chunks[(col, row)] = chunk
+        if chunk is not None:
+            self.size_bytes += chunk.get_pitch() * chunk.get_height()
+        return chunk
+
+    def build_chunk(self, col, row):
+        area = pygame.Rect(col * self.chunk_size, row * self.chunk_size, self.chunk_size, self.chunk_size)
+        tiles = self.tiles.get_colliding(area)
+        if not tiles:
+            return None
+        chunk = pygame.Surface(area.size, pygame.SRCALPHA)
+        for tile in tiles:
+            chunk.blit(tile.image, (tile.rect.x - area.x, tile.rect.y - area.y))
+        return chunk
+
+    def get_blits(self, camera, view):
+        # соседние с экраном куски собираем заранее, пока камера к ним подъезжает
+        near = view.inflate(self.chunk_size, self.chunk_size)
+        offset_x, offset_y = camera.offset
+        blits = []
+        in_use = 0
+        for row in range(near.top // self.chunk_size, (near.bottom - 1) // self.chunk_size + 1):
+            for col in range(near.left // self.chunk_size, (near.right - 1) // self.chunk_size + 1):
+                chunk = self.get_chunk(col, row)
+                in_use += 1
+                if chunk is None:
+                    continue
+                chunk_rect = pygame.Rect(col * self.chunk_size, row * self.chunk_size,
+                                         self.chunk_size, self.chunk_size)
+                if view.colliderect(chunk_rect):
+                    blits.append((chunk, (chunk_rect.x + offset_x, chunk_rect.y + offset_y)))
+        self.release(in_use)
+        return blits
+
+    def release(self, keep):
+        while self.size_bytes > self.memory_budget and len(self.chunks) > keep:
+            _, chunk = self.chunks.popitem(last=False)
+            if chunk is not None:
+                self.size_bytes -= chunk.get_pitch() * chunk.get_height()
+
+
 class Camera:
     def __init__(self, map_width, map_height):
         self.camera = pygame.Rect(0, 0, map_width, map_height)
@@ -77,11 +155,27 @@ class Camera:
         self.smooth_speed = 0.1
         self.current_x = 0
         self.current_y = 0
+        self.previous_topleft = (0, 0)
+        # смещение для отрисовки, сглаженное между двумя тиками симуляции
+        self.offset = (0, 0)
 
     def apply(self, rect):
-        return rect.move(self.camera.topleft)
+        return rect.move(self.offset)
+
+    def get_view_rect(self):
+        return pygame.Rect(-self.offset[0], -self.offset[1], screen_width, screen_height)
+
+    def get_simulation_view_rect(self):
+        # без сглаживания отрисовки, чтобы симуляция не зависела от частоты кадров
+        return pygame.Rect(-self.camera.x, -self.camera.y, screen_width, screen_height)
+
+    def interpolate(self, alpha):
+        previous_x, previous_y = self.previous_topleft
+        self.offset = (round(previous_x + (self.camera.x - previous_x) * alpha),
+                       round(previous_y + (self.camera.y - previous_y) * alpha))
 
     def update(self, target):
+        self.previous_topleft = self.camera.topleft
         target_x = -target.rect.centerx + int(screen_width / 2)
         target_y = -target.rect.centery + int(screen_height / 1.5)
 
@@ -93,6 +187,7 @@ class Camera:
 
         self.camera = pygame.Rect(self.current_x, self.current_y,
                                   self.map_width, self.map_height)
+        self.offset = self.camera.topleft
         return target_x != new_x
 
 
@@ -106,7 +201,7 @@ class ParallaxBackground:
         self.rect = self.image.get_rect()
 
     def update(self, camera):
-        self.rect.x = round(-camera.camera.x * self.speed_factor)
+        self.rect.x = round(-camera.offset[0] * self.speed_factor)
         if self.rect.x >= self.image_width:
             self.rect.x %= self.image_width
         elif self.rect.x < 0:
@@ -118,6 +213,13 @@ class ParallaxBackground:
 
 
 
+MOVING_GROUPS = (enemy_group, hero_group, damage_text_group)
+POOLS = (damage_text_pool, money_text_pool)
+# сколько объектов каждого пула готовится при загрузке уровня
+# в огне цифра урона появляется каждый тик и живёт 160 тиков
+DAMAGE_TEXT_POOL_SIZE = 160
+MONEY_TEXT_POOL_SIZE = 4
+
 background_layers = [
     ParallaxBackground("background/background_layer_1.png", 0.2),
     ParallaxBackground("background/background_layer_2.png", 0.5),
@@ -126,12 +228,22 @@ background_layers = [
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, dirty_rects=False, headless=HEADLESS, save_path=SAVE_PATH, render_fps=FPS,
+                 recorder=None):
         pygame.display.set_caption("Iron Knight")
+        self.recorder = recorder
+        self.headless = headless
+        self.render_fps = render_fps
+        self.accumulator = 0
+        self.pending_events = []
+        self.previous_positions = {}
+        self.save_path = save_path
+        self.frame = 0
         self.main_menu_opened = True
         self.final_menu = False
         self.main_menu = MainMenu(screen)
         self.font = pygame.font.Font("fonts/monogram.ttf", 120)
+        self.won_texts = None
 
         
         self.health_bar = HealthBar(screen, screen_width / 2 - screen_width // 30 - 200,
@@ -143,6 +255,11 @@ class Game:
 
         
         self.camera = Camera(screen_width, screen_height)
+        self.tile_chunks = TileChunks(sprite_group)
+        self.render_queue = RenderQueue()
+        self.profiler = FrameProfiler()
+        self.presenter = DisplayPresenter(dirty_rects)
+        self.camera_offset = None
 
         
         self.damage = 0
@@ -162,11 +279,48 @@ class Game:
         self.attack_cooldown = 1
         self.last_attack_time = 0
 
+        # сколько спрайтов нарисовано и отсечено камерой в последнем кадре
+        self.drawn_count = 0
+        self.culled_count = 0
+
     def transition_to_next_level(self):
         self.transitioning = True
         self.transition_start_time = pygame.time.get_ticks()
 
     def update(self):
+        # симуляция идёт фиксированными тиками, отрисовка - с частотой render_fps
+        self.accumulator += min(clock.tick(self.render_fps) / 1000, MAX_FRAME_TIME)
+        self.profiler.begin_frame()
+        frame_input = FrameInput.from_pygame()
+        self.handle_ui_input(frame_input)
+        self.pending_events.extend(frame_input.events)
+        self.profiler.mark('input')
+        steps = 0
+        while self.accumulator >= TICK_TIME and steps < MAX_TICKS_PER_FRAME:
+            self.save_positions()
+            inputs = FrameInput(frame_input.keys, self.pending_events)
+            self.pending_events = []
+            self.accumulator -= TICK_TIME
+            steps += 1
+            if not self.step(inputs):
+                self.accumulator = 0
+                return
+        if steps == MAX_TICKS_PER_FRAME:
+            # не догоняем бесконечно, если кадры стабильно не успевают
+            self.accumulator = min(self.accumulator, TICK_TIME)
+        if not self.headless:
+            self.render(self.accumulator / TICK_TIME)
+            self.presenter.present()
+            self.profiler.mark('flip')
+        self.profiler.end_frame()
+
+    def save_positions(self):
+        self.previous_positions = {sprite: sprite.rect.topleft for group in MOVING_GROUPS for sprite in group}
+
+    def step(self, inputs):
+        # один тик симуляции без отрисовки; False, если кадр не нужно показывать
+        if self.recorder is not None:
+            self.recorder.record(inputs)
         if self.transitioning:
             current_time = pygame.time.get_ticks()
             if current_time - self.transition_start_time < self.level_transition_duration:
@@ -176,103 +330,145 @@ class Game:
                 overlay.fill((0, 0, 0))
                 overlay.set_alpha(int(alpha * 255))
                 self.transitioning = False
-        else:
-            if not self.hero.is_alive:
-                self.death_timer += 1
-                if self.death_timer >= 240:
-                    self.score = 0
-                    self.money = 0
+            return False
+
+        if not self.hero.is_alive:
+            self.death_timer += 1
+            if self.death_timer >= 240:
+                self.score = 0
+                self.money = 0
+                self.prepare_level()
+                return False
+        self.frame += 1
+        activity.begin(self.camera.get_simulation_view_rect())
+        entity_index.rebuild(hero_group, enemy_group.get_nearby())
+        self.handle_user_input(inputs)
+        self.profiler.mark('input')
+        self.camera.update(self.hero)
+        self.profiler.mark('camera')
+        self.update_attributes()
+
+        
+        self.health_bar.update(self.hero.health)
+        self.stamina_bar.update(self.hero.endurance)
+
+        # далёкие ловушки и магазины спят, с ними всё равно нельзя взаимодействовать
+        traps = activity.select(trap_group)
+        shops = activity.select(shop_group)
+        for trap in traps:
+            if isinstance(trap, Chest):
+                money = trap.get_money()
+                if money:
+                    self.money += money
+                    self.score += money
+            if isinstance(trap, Portal):
+                if trap.teleport():
+                    self.hero.kill()
+                    self.current_level += 1
+                    self.save_game(self.current_level, self.money, self.score, self.shop_menu.current_value_damage, self.shop_menu.current_value_armor, self.shop_menu.current_value_stamina)
+                    self.transition_to_next_level()
                     self.prepare_level()
-                    return
-            print(self.hero.attack_timer)
-            self.handle_user_input()
-            self.camera.update(self.hero)
-            self.update_attributes()
-
-            
-            for layer in background_layers:
-                layer.update(self.camera)
-
-            
-            self.health_bar.update(self.hero.health)
-            self.stamina_bar.update(self.hero.endurance)
-
-            
-            screen.fill((0, 0, 0))
-
-            
-            for layer in background_layers:
-                layer.draw(screen)
-
-            
-            for tile in sprite_group:
-                screen.blit(tile.image, self.camera.apply(tile.rect))
-
-            for trap in trap_group:
-                screen.blit(trap.image, self.camera.apply(trap.rect))
-                if isinstance(trap, Chest):
-                    money = trap.get_money()
-                    if money:
-                        self.money += money
-                        self.score += money
-                if isinstance(trap, Portal):
-                    if trap.teleport():
-                        self.hero.kill()
-                        self.current_level += 1
-                        self.save_game(self.current_level, self.money, self.score, self.shop_menu.current_value_damage, self.shop_menu.current_value_armor, self.shop_menu.current_value_stamina)
-                        self.transition_to_next_level()
-                        self.prepare_level()
-                        return
-
-            for shop in shop_group:
-                screen.blit(shop.image, self.camera.apply(shop.rect))
-                if shop.check_for_player() and self.e_pressed:
-                    self.menu_opened = True
-
-            for enemy in enemy_group:
-                screen.blit(enemy.image, self.camera.apply(enemy.rect))
-
-            for entity in hero_group:
-                screen.blit(entity.image, self.camera.apply(entity.rect))
-
-            for text in damage_text_group:
-                screen.blit(text.image, self.camera.apply(text.rect))
-
-            for arrow in weapon_object_group:
-                screen.blit(arrow.image, self.camera.apply(arrow.rect))
-
-            
-            self.health_bar.draw()
-            self.stamina_bar.draw()
-            self.coin_counter.draw(screen, self.money)
-            if self.menu_opened:
-                self.shop_menu.draw_menu()
-
-            
-            weapon_object_group.update()
-            trap_group.update()
-            self.hero.update()
-            shop_group.update()
-            particles_group.update()
-            enemy_group.update()
-            damage_text_group.update()
-
-            pygame.display.flip()
-            clock.tick(60)
+                    return False
+
+        for shop in shops:
+            if shop.check_for_player() and self.e_pressed:
+                self.menu_opened = True
+
+        
+        arrows.update(sprite_group, hero_group)
+        animation_clocks.update()
+        for trap in traps:
+            trap.update()
+        self.hero.update()
+        for shop in shops:
+            shop.update()
+        spark_emitter.update()
+        enemy_group.update()
+        damage_text_group.update()
+        self.profiler.mark('update')
+        return True
+
+    def simulate(self, frames, inputs=()):
+        # прогон без окна и без ограничения частоты кадров
+        idle = FrameInput()
+        for i in range(frames):
+            if not self.running or self.final_menu:
+                break
+            self.step(inputs[i] if i < len(inputs) else idle)
+
+    def render(self, alpha=1.0):
+        self.camera.interpolate(alpha)
+
+        
+        for layer in background_layers:
+            layer.update(self.camera)
+
+        
+        screen.fill((0, 0, 0))
+
+        
+        for layer in background_layers:
+            layer.draw(screen)
+        self.profiler.mark('background')
+
+        
+        if self.camera.offset != self.camera_offset:
+            # при движении камеры меняется весь экран
+            self.camera_offset = self.camera.offset
+            self.presenter.invalidate()
+
+        view = self.camera.get_view_rect()
+        self.render_queue.begin(self.camera, view, self.presenter.dirty_rects)
+        self.render_queue.add_layer(self.tile_chunks.get_blits(self.camera, view))
+        self.render_queue.submit(screen)
+        self.profiler.mark('tiles')
+        self.render_queue.add_sprites(trap_group)
+        self.render_queue.add_sprites(shop_group)
+        self.render_queue.submit(screen)
+        self.profiler.mark('traps')
+        for group, phase in ((enemy_group, 'enemies'), (hero_group, 'hero'), (damage_text_group, 'text')):
+            self.render_queue.add_sprites(group, self.previous_positions, alpha)
+            self.render_queue.submit(screen)
+            self.profiler.mark(phase)
+        self.render_queue.add_blits(arrows.get_blits(self.camera.offset, view, alpha), arrows.count)
+        self.render_queue.submit(screen)
+        self.profiler.mark('enemies')
+        self.render_queue.add_blits(spark_emitter.get_blits(self.camera.offset, view, alpha), spark_emitter.count)
+        self.render_queue.submit(screen)
+        self.profiler.mark('particles')
+        self.presenter.mark(*self.render_queue.dirty_rects or ())
+        self.drawn_count = self.render_queue.drawn
+        self.culled_count = self.render_queue.culled
+
+        
+        self.health_bar.draw()
+        self.stamina_bar.draw()
+        self.coin_counter.draw(screen, self.money)
+        if self.menu_opened:
+            self.shop_menu.draw_menu()
+        self.presenter.mark(self.health_bar.get_rect(), self.stamina_bar.get_rect(),
+                            self.coin_counter.get_rect())
+        self.presenter.mark_changed('shop_menu', self.shop_menu.bg_rect,
+                                    (self.shop_menu.get_attributes(), pygame.mouse.get_pos())
+                                    if self.menu_opened else None)
+        if self.profiler.visible:
+            self.presenter.mark(self.profiler.draw(screen))
+        self.presenter.mark_changed('profiler', self.profiler.get_rect(screen), self.profiler.visible)
+        self.profiler.mark('hud')
 
     def set_current_level(self):
         self.level_map = self.load_level(f"map/{self.current_level}.txt")
         self.hero = self.generate_level(self.level_map)
 
     def generate_level(self, level):
+        self.tile_chunks.clear()
+        assets.begin_level()
         new_player = None
         for y in range(len(level)):
             for x in range(len(level[y])):
                 symb = level[y][x]
-                if symb == '-':
-                    Tile('-', x, y)
-                elif symb == '#':
-                    Tile('#', x, y)
+                if symb in TILES:
+                    sprite_group.place(Tile(symb, x, y), x, y)
                 elif symb == '@':
                     new_player = Player(x * TILE_WIDTH, y * TILE_HEIGHT, sprite_group)
                     level[y][x] = "."
@@ -299,64 +495,78 @@ class Game:
                     Tombstone(x * TILE_WIDTH, y * TILE_HEIGHT, "tombstone", hero_group, enemy_group)
                 elif symb == 'G':
                     Portal(x * TILE_WIDTH, y * TILE_HEIGHT, "portal", hero_group, enemy_group)
+        self.prewarm_pools()
+        # всё, что не понадобилось новому уровню, выгружается
+        assets.end_level()
         return new_player
 
+    def prewarm_pools(self):
+        if enemy_group:
+            damage_text_pool.prewarm(DAMAGE_TEXT_POOL_SIZE, 0, 0, 0)
+        if any(isinstance(trap, Chest) for trap in trap_group):
+            money_text_pool.prewarm(MONEY_TEXT_POOL_SIZE, 0, 0, 0)
+
     def load_level(self, filename):
         with open(filename, 'r') as mapFile:
             level_map = [line.strip() for line in mapFile]
         max_width = max(map(len, level_map))
         return list(map(lambda x: list(x.ljust(max_width, '.')), level_map))
 
-    def handle_user_input(self):
+    def handle_ui_input(self, inputs):
+        # профайлер не часть симуляции: его клавиши не записываются и не повторяются при воспроизведении
+        for event in inputs.ui_events:
+            if event[0] == "profiler":
+                self.profiler.toggle()
+            if event[0] == "dump_profile":
+                self.profiler.dump_csv(time.strftime("profile_%Y%m%d_%H%M%S.csv"))
+
+    def handle_user_input(self, inputs):
         if self.e_pressed:
             self.e_pressed = False
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+        for event in inputs.events:
+            if event[0] == "quit":
                 self.running = False
-            if event.type == pygame.KEYUP and event.key == pygame.K_z:
+            if event[0] == "attack":
                 self.player_attack(self.hero, enemy_group)
-            if event.type == pygame.KEYUP and event.key == pygame.K_e:
+            if event[0] == "interact":
                 self.e_pressed = True
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  
-                    if self.menu_opened:
-                        flag = self.shop_menu.handle_click(pygame.mouse.get_pos(), self.money)
-                        if flag == "closed":
-                            self.menu_opened = False
-                        if flag:
-                            if "damage" in flag:
-                                self.money -= flag[1]
-                            elif "armor" in flag:
-                                self.money -= flag[1]
-                            elif "stamina" in flag:
-                                self.money -= flag[1]
-                    else:
-                        self.hero.attack()
+            if event[0] == "click":
+                if self.menu_opened:
+                    flag = self.shop_menu.handle_click(event[1], self.money)
+                    if flag == "closed":
+                        self.menu_opened = False
+                    if flag:
+                        if "damage" in flag:
+                            self.money -= flag[1]
+                        elif "armor" in flag:
+                            self.money -= flag[1]
+                        elif "stamina" in flag:
+                            self.money -= flag[1]
+                else:
+                    self.hero.attack()
 
         
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        if inputs.pressed(pygame.K_RIGHT) or inputs.pressed(pygame.K_d):
             self.hero.move_x(5)
-        elif keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        elif inputs.pressed(pygame.K_LEFT) or inputs.pressed(pygame.K_a):
             self.hero.move_x(-5)
         else:
             self.hero.move_x(0)
 
-        if keys[pygame.K_SPACE]:
+        if inputs.pressed(pygame.K_SPACE):
             self.hero.jump()
 
     def attack_engine(self, hero, enemies):
         if enemies:
-            for enemy in enemies:
-                if (hero.rect.colliderect(enemy.real_rect)
-                        and hero.is_alive and hero.is_attacking
-                        and hero.on_ground):
+            for enemy in entity_index.query(hero.rect, enemies):
+                if hero.is_alive and hero.is_attacking and hero.on_ground:
                     enemy.take_hit(self.damage)
                     hero.attacking_flag = False
                     self.check_enemies(enemy)
 
     def player_attack(self, hero, enemies):
-        current_time = pygame.time.get_ticks() / 1000  
+        # время считаем в тиках симуляции, чтобы прогон без окна не зависел от часов
+        current_time = self.frame / FPS
         if current_time - self.last_attack_time >= self.attack_cooldown:
             hero.attack()
             if hero.attack_timer == 1:
@@ -391,23 +601,31 @@ class Game:
             'health': health,
             'stamina': stamina
         }
-        with open('save/save_game.json', 'w') as f:
+        with open(self.save_path, 'w') as f:
             json.dump(game_state, f)
 
     def load_game(self):
-        with open('save/save_game.json', 'r') as f:
+        with open(self.save_path, 'r') as f:
             game_state = json.load(f)
         return game_state['level'], game_state['money'], game_state['score'], game_state['damage'], game_state[
             'health'], game_state['stamina']
 
     def prepare_level(self):
-        weapon_object_group.empty()
+        if self.recorder is not None:
+            self.recorder.start(self, "continue")
+        self.presenter.invalidate()
+        sprite_group.empty()
+        arrows.clear()
         trap_group.empty()
         shop_group.empty()
-        particles_group.empty()
+        spark_emitter.clear()
+        activity.clear()
+        animation_clocks.clear()
         enemy_group.empty()
         damage_text_group.empty()
         hero_group.empty()
+        for pool in POOLS:
+            pool.reclaim()
         try:
             level, money, score, damage, health, stamina = self.load_game()
             self.current_level = level
@@ -429,13 +647,21 @@ class Game:
             self.new_game()
 
     def new_game(self):
-        weapon_object_group.empty()
+        if self.recorder is not None:
+            self.recorder.start(self, "new")
+        self.presenter.invalidate()
+        sprite_group.empty()
+        arrows.clear()
         trap_group.empty()
         shop_group.empty()
-        particles_group.empty()
+        spark_emitter.clear()
+        activity.clear()
+        animation_clocks.clear()
         enemy_group.empty()
         damage_text_group.empty()
         hero_group.empty()
+        for pool in POOLS:
+            pool.reclaim()
         self.current_level = 1
         self.money = 0
         self.score = 0
@@ -451,10 +677,12 @@ class Game:
     def start_cycle(self):
         while self.running:
             if self.final_menu:
-                screen.fill((0, 0, 0))
-                self.draw_won_menu()
-                pygame.display.flip()
-                clock.tick(60)
+                # финальное окно статично, в режиме грязных областей рисуем его один раз
+                if not self.presenter.dirty_rects or self.presenter.full_redraw:
+                    screen.fill((0, 0, 0))
+                    self.draw_won_menu()
+                self.presenter.present()
+                clock.tick(FPS)
             else:
                 if self.main_menu_opened:
                     screen.fill((0, 0, 0))
@@ -464,13 +692,7 @@ class Game:
 
                     screen.blit(logo, logo_rect)
 
-                    for i, (text, (x, y)) in enumerate(zip(self.main_menu.menu_items, self.main_menu.button_positions)):
-                        mouse_pos = pygame.mouse.get_pos()
-                        is_hovered = (x - (self.main_menu.font.size(text)[0] + 20) // 2 <= mouse_pos[0] <= x + (
-                                self.main_menu.font.size(text)[0] + 20) // 2 and
-                                      y - (self.main_menu.font.get_height() + 10) // 2 <= mouse_pos[1] <= y + (
-                                              self.main_menu.font.get_height() + 10) // 2)
-                        self.main_menu.draw_button(text, x, y, is_hovered)
+                    self.main_menu.draw_buttons(pygame.mouse.get_pos())
 
                     for event in pygame.event.get():
                         if event.type == pygame.QUIT:
@@ -491,22 +713,33 @@ class Game:
                                 elif button_clicked == 3:
                                     pygame.quit()
                                     return
-                    pygame.display.flip()
-                    clock.tick(60)
+                    self.presenter.invalidate()
+                    self.presenter.present()
+                    clock.tick(FPS)
                 else:
                     self.update()  
 
     def draw_won_menu(self):
-        text = self.font.render("You Won!", True, (255, 0, 0))
-        text_rect = text.get_rect(center=(screen_width // 2, screen_height // 2 - 50))
-        screen.blit(text, text_rect)
+        if self.won_texts is None or self.won_texts[0] != self.score:
+            text = self.font.render("You Won!", True, (255, 0, 0))
+            text_rect = text.get_rect(center=(screen_width // 2, screen_height // 2 - 50))
 
-        score_text = self.font.render(f"Score: {self.score}", True, (255, 215, 0))  # Золотой цвет
-        score_rect = score_text.get_rect(center=(screen_width // 2, screen_height // 2 + 20))
-        screen.blit(score_text, score_rect)
+            score_text = self.font.render(f"Score: {self.score}", True, (255, 215, 0))  # Золотой цвет
+            score_rect = score_text.get_rect(center=(screen_width // 2, screen_height // 2 + 20))
+            self.won_texts = (self.score, [(text, text_rect), (score_text, score_rect)])
+        screen.blits(self.won_texts[1], doreturn=False)
 
 
 
 if __name__ == '__main__':
-    game = Game()
-    game.start_cycle()
+    render_fps = int(sys.argv[sys.argv.index('--fps') + 1]) if '--fps' in sys.argv else FPS
+    recorder = InputRecorder() if '--record' in sys.argv else None
+    game = Game(dirty_rects='--dirty-rects' in sys.argv, render_fps=render_fps, recorder=recorder)
+    if game.headless:
+        game.new_game()
+        game.simulate(FPS * 60)
+    else:
+        game.start_cycle()
+    if recorder is not None and recorder.mode is not None:
+        recorder.finish(game)
+        recorder.save(sys.argv[sys.argv.index('--record') + 1])
@@ -1,3 +1,11 @@
+import os
+
+# без окна: симуляция на фиктивном видеодрайвере SDL, например для прогонов на CI
+HEADLESS = os.environ.get("IRON_KNIGHT_HEADLESS") == "1"
+if HEADLESS:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
 import pygame
 
 
@@ -1,84 +1,90 @@
-import pygame
-from methods import load_image
-from groups import SpriteGroup
-
-SPARK1 = [load_image(f"particles/spark1/{x}.png") for x in range(1, 21)]
-particles_group = SpriteGroup()
-
-
-class Particle(pygame.sprite.Sprite):
-    def __init__(self, x, y, particle_type):
-        super().__init__(particles_group)
-        self.scale_factor = 1.5
-        self.rect = pygame.Rect(0, 0, 100 * self.scale_factor, 100 * self.scale_factor)
-        self.rect.center = x, y
-        self.particle_type = particle_type
-        self.images = {
-            'spark1': SPARK1
-        }
-        self.animation_index = 0
-        self.animation_speed = 71
-        self.animation_timer = 0
-        self.image = self.get_cropped_image(self.images[self.particle_type][self.animation_index])
-
-
-
-    def update(self):
-        self.update_animation()
-
-    def update_animation(self):
-        self.animation_timer += self.animation_speed
-        if self.animation_timer >= 10:
-            self.animation_timer = 0
-            self.animation_index += 1
-        if self.animation_index >= len(self.images[self.particle_type]):
-            self.destroy()
-            print("уничтожил")
+import numpy as np
+
+from frames import frame_cache
+from assets import assets
+
+MAX_PARTICLES = 4096
+
+
+class ParticleEmitter:
+    # состояние всех частиц хранится в массивах и обновляется разом, без спрайта на каждую искру
+    def __init__(self, animation, scale_factor=1.5, size=(150, 150), capacity=MAX_PARTICLES, gravity=0.0):
+        self.animation = animation
+        self.scale_factor = scale_factor
+        self.size = size
+        self.capacity = capacity
+        self.gravity = gravity
+        self.frames = None
+        self.count = 0
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.previous = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.int32)
+        self.rng = np.random.default_rng()
+        self.dropped = 0
+
+    def get_frames(self):
+        # кадры берутся у менеджера ресурсов и обрабатываются один раз на уровень
+        if self.frames is None:
+            self.frames = [frame_cache.get(image, self.scale_factor, self.size, anchor="center")
+                           for image in assets.get(self.animation)]
+        return self.frames
+
+    def emit(self, x, y, count=1, speed=0.0):
+        self.get_frames()
+        # считаются частицы, которым не хватило места, в том числе хвост частично вошедшей вспышки
+        fits = min(count, self.capacity - self.count)
+        self.dropped += count - max(fits, 0)
+        count = fits
+        if count <= 0:
+            return
+        start, end = self.count, self.count + count
+        self.position[start:end] = (x, y)
+        self.previous[start:end] = (x, y)
+        if speed:
+            angle = self.rng.uniform(0, 2 * np.pi, count)
+            velocity = speed * self.rng.uniform(0.5, 1, count)
+            self.velocity[start:end, 0] = np.cos(angle) * velocity
+            self.velocity[start:end, 1] = np.sin(angle) * velocity
         else:
-            self.image = self.get_cropped_image(self.images[self.particle_type][self.animation_index])
-
-    def get_cropped_image(self, original_image):
-        
-        non_transparent_rect = original_image.get_bounding_rect()
-        
-        crop_width = non_transparent_rect.width
-        crop_height = non_transparent_rect.height
-
-        
-        crop_rect = pygame.Rect(
-            non_transparent_rect.x + (non_transparent_rect.width // 2) - (crop_width // 2),
-            non_transparent_rect.y + (non_transparent_rect.height // 2) - (crop_height // 2),
-            crop_width,
-            crop_height
-        )
+            self.velocity[start:end] = 0
+        self.age[start:end] = 0
+        self.count = end
 
-        
-        cropped_image = pygame.Surface((crop_width, crop_height), pygame.SRCALPHA)
-
-        
-        cropped_image.blit(original_image, (0, 0), crop_rect)
-
-        
-        scaled_image = pygame.transform.scale(cropped_image,
-                                              (int(crop_width * self.scale_factor),
-                                               int(crop_height * self.scale_factor)))
-
-        
-        centered_image = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-
-        x_pos = (self.rect.width - scaled_image.get_width()) // 2
-        y_pos = (self.rect.height - scaled_image.get_height()) // 2
-        
-
-        
-        centered_image.blit(scaled_image, (x_pos, y_pos))
-
-        return centered_image
-
-    def destroy(self):
-        self.kill()
-
-    def draw(self, screen):
-        border_color = (255, 0, 0)  
-        border_thickness = 2  
-        pygame.draw.rect(screen, border_color, self.rect, border_thickness)
+    def update(self):
+        count = self.count
+        if not count:
+            return
+        self.previous[:count] = self.position[:count]
+        self.velocity[:count, 1] += self.gravity
+        self.position[:count] += self.velocity[:count]
+        self.age[:count] += 1
+
+        # догоревшие частицы убираются, живые сдвигаются в начало массивов
+        alive = self.age[:count] < len(self.frames)
+        live = int(alive.sum())
+        if live < count:
+            for array in (self.position, self.previous, self.velocity, self.age):
+                array[:live] = array[:count][alive]
+            self.count = live
+
+    def get_blits(self, offset, view, alpha=1.0):
+        count = self.count
+        if not count:
+            return []
+        position = self.previous[:count] + (self.position[:count] - self.previous[:count]) * min(alpha, 1.0)
+        left = np.rint(position[:, 0]).astype(np.int32) - self.size[0] // 2
+        top = np.rint(position[:, 1]).astype(np.int32) - self.size[1] // 2
+        visible = ((left < view.right) & (left + self.size[0] > view.left) &
+                   (top < view.bottom) & (top + self.size[1] > view.top))
+        frames = self.frames
+        return [(frames[age], (x + offset[0], y + offset[1]))
+                for age, x, y in zip(self.age[:count][visible].tolist(), left[visible].tolist(),
+                                     top[visible].tolist())]
+
+    def clear(self):
+        self.count = 0
+        self.frames = None
+
+
+spark_emitter = ParticleEmitter('spark1')
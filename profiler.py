@@ -0,0 +1,94 @@
+import csv
+import time
+from collections import deque
+
+import pygame
+
+FONT_PATH = "fonts/monogram.ttf"
+
+PHASES = ('input', 'camera', 'background', 'tiles', 'traps', 'enemies', 'hero', 'text', 'particles', 'hud', 'update', 'flip')
+HISTORY = 600
+GRAPH_FRAMES = 240
+GRAPH_HEIGHT = 80
+PANEL_WIDTH = 320
+BUDGET_MS = 1000 / 60
+
+
+class FrameProfiler:
+    def __init__(self, history=HISTORY):
+        self.visible = False
+        # кольцевой буфер кадров: время каждой фазы и всего кадра в миллисекундах
+        self.frames = deque(maxlen=history)
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.frame_start = time.perf_counter()
+        self.last = self.frame_start
+        self.font = None
+
+    def begin_frame(self):
+        self.frame_start = self.last = time.perf_counter()
+        self.current = dict.fromkeys(PHASES, 0.0)
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.current[phase] += (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self):
+        self.current['frame'] = (time.perf_counter() - self.frame_start) * 1000
+        self.frames.append(self.current)
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def percentile(self, value):
+        times = sorted(frame['frame'] for frame in self.frames)
+        if not times:
+            return 0.0
+        return times[min(len(times) - 1, int(len(times) * value / 100))]
+
+    def averages(self, count=60):
+        recent = list(self.frames)[-count:]
+        if not recent:
+            return dict.fromkeys(PHASES + ('frame',), 0.0)
+        return {phase: sum(frame[phase] for frame in recent) / len(recent) for phase in PHASES + ('frame',)}
+
+    def dump_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('frame',) + PHASES + ('total',))
+            for number, frame in enumerate(self.frames):
+                writer.writerow([number] + [f"{frame[phase]:.3f}" for phase in PHASES] + [f"{frame['frame']:.3f}"])
+
+    def get_rect(self, screen):
+        height = (len(PHASES) + 3) * 20 + GRAPH_HEIGHT + 20
+        return pygame.Rect(screen.get_width() - PANEL_WIDTH - 10, 10, PANEL_WIDTH, height)
+
+    def draw(self, screen):
+        if self.font is None:
+            self.font = pygame.font.Font(FONT_PATH, 24)
+        rect = self.get_rect(screen)
+        panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+
+        averages = self.averages()
+        lines = [f"frame {averages['frame']:6.2f} ms",
+                 f"p50 {self.percentile(50):.2f}  p95 {self.percentile(95):.2f}  p99 {self.percentile(99):.2f}"]
+        lines += [f"{phase:<11}{averages[phase]:6.2f}" for phase in PHASES]
+        for i, line in enumerate(lines):
+            panel.blit(self.font.render(line, True, (255, 255, 255)), (10, 5 + i * 20))
+
+        # график последних кадров, красная линия - бюджет 60 кадров в секунду
+        graph_top = rect.height - GRAPH_HEIGHT - 10
+        scale = GRAPH_HEIGHT / (BUDGET_MS * 2)
+        budget_y = graph_top + GRAPH_HEIGHT - BUDGET_MS * scale
+        pygame.draw.line(panel, (255, 0, 0), (10, budget_y), (rect.width - 10, budget_y))
+        recent = list(self.frames)[-GRAPH_FRAMES:]
+        step = (rect.width - 20) / GRAPH_FRAMES
+        for i, frame in enumerate(recent):
+            height = min(GRAPH_HEIGHT, frame['frame'] * scale)
+            x = 10 + i * step
+            color = (0, 255, 0) if frame['frame'] <= BUDGET_MS else (255, 200, 0)
+            pygame.draw.line(panel, color, (x, graph_top + GRAPH_HEIGHT), (x, graph_top + GRAPH_HEIGHT - height))
+
+        screen.blit(panel, rect)
+        return rect
@@ -0,0 +1,131 @@
+import numpy as np
+
+from frames import frame_cache
+from assets import assets
+from particles import spark_emitter
+
+MAX_PROJECTILES = 256
+# сколько тиков живёт стрела в полёте и воткнувшись в стену
+FLIGHT_TTL = 600
+STUCK_TTL = 180
+FADE_TICKS = 60
+# шаг прозрачности при исчезновении, чтобы в кеше кадров было немного вариантов
+FADE_STEP = 15
+
+
+def round_half_away(values):
+    # так округляет pygame.Rect при присваивании дробных координат
+    return (np.sign(values) * np.floor(np.abs(values) + 0.5)).astype(np.int64)
+
+
+class ProjectileManager:
+    # все стрелы уровня в массивах: положение, скорость, пройденный путь и время жизни
+    def __init__(self, animation, scale_factor=1.5, size=(45, 7), capacity=MAX_PROJECTILES):
+        self.animation = animation
+        self.scale_factor = scale_factor
+        self.width, self.height = size
+        self.capacity = capacity
+        self.image = None
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.int64)
+        self.y = np.zeros(capacity, dtype=np.int64)
+        self.previous_x = np.zeros(capacity, dtype=np.int64)
+        self.previous_y = np.zeros(capacity, dtype=np.int64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.distance = np.zeros(capacity, dtype=np.float64)
+        self.damage = np.zeros(capacity, dtype=np.float64)
+        self.flip = np.zeros(capacity, dtype=bool)
+        self.stopped = np.zeros(capacity, dtype=bool)
+        self.ttl = np.zeros(capacity, dtype=np.int64)
+        self.arrays = (self.x, self.y, self.previous_x, self.previous_y, self.speed, self.distance,
+                       self.damage, self.flip, self.stopped, self.ttl)
+        self.dropped = 0
+
+    def spawn(self, x, y, direction, damage=20):
+        if self.image is None:
+            self.image = assets.get(self.animation)[0]
+        if self.count == self.capacity:
+            # при переполнении пропадает самая старая стрела
+            self.remove(np.arange(self.count) != 0)
+            self.dropped += 1
+        i = self.count
+        self.x[i] = self.previous_x[i] = x - 10
+        self.y[i] = self.previous_y[i] = y - 5
+        self.speed[i] = 15 * direction
+        self.distance[i] = 0
+        self.damage[i] = damage
+        self.flip[i] = direction == -1
+        self.stopped[i] = False
+        self.ttl[i] = FLIGHT_TTL
+        self.count += 1
+
+    def remove(self, keep):
+        live = int(keep.sum())
+        for array in self.arrays:
+            array[:live] = array[:self.count][keep]
+        self.count = live
+
+    def update(self, tiles, heroes):
+        count = self.count
+        if not count:
+            return
+        x, y = self.x[:count], self.y[:count]
+        self.previous_x[:count] = x
+        self.previous_y[:count] = y
+        flying = ~self.stopped[:count]
+
+        # попадание в героя проверяется до движения, как и удар о стену
+        hit_by = np.full(count, -1)
+        heroes = list(heroes)
+        for i, hero in enumerate(heroes):
+            rect = hero.real_rect
+            hit = (flying & (hit_by < 0) & (x < rect.right) & (x + self.width > rect.left) &
+                   (y < rect.bottom) & (y + self.height > rect.top))
+            hit_by[hit] = i
+        for i in np.flatnonzero(hit_by >= 0).tolist():
+            hero = heroes[hit_by[i]]
+            hero.take_hit(float(self.damage[i]))
+            spark_emitter.emit(hero.real_rect.centerx, hero.real_rect.centery)
+        flying &= hit_by < 0
+
+        walls = flying & tiles.get_colliding_mask(x, y, self.width, self.height)
+        self.stopped[:count] |= walls
+        self.ttl[:count][walls] = STUCK_TTL
+
+        # стрела, только что воткнувшаяся в стену, ещё сдвигается в этом тике
+        speed, distance = self.speed[:count], self.distance[:count]
+        y[flying] = round_half_away(y[flying] + np.abs(distance[flying] / 500))
+        x[flying] = round_half_away(x[flying] + speed[flying])
+        distance[flying] += speed[flying]
+        speed[flying] -= 0.02
+        self.ttl[:count] -= 1
+
+        keep = (hit_by < 0) & (self.ttl[:count] > 0)
+        if not keep.all():
+            self.remove(keep)
+
+    def get_alpha(self, ttl):
+        return min(255, ttl * 255 // FADE_TICKS // FADE_STEP * FADE_STEP)
+
+    def get_blits(self, offset, view, alpha=1.0):
+        count = self.count
+        if not count:
+            return []
+        x, y = self.x[:count], self.y[:count]
+        visible = (x < view.right) & (x + self.width > view.left) & (y < view.bottom) & (y + self.height > view.top)
+        previous_x, previous_y = self.previous_x[:count][visible], self.previous_y[:count][visible]
+        alpha = min(alpha, 1.0)
+        left = np.rint(previous_x + (x[visible] - previous_x) * alpha).astype(np.int64)
+        top = np.rint(previous_y + (y[visible] - previous_y) * alpha).astype(np.int64)
+        size = (self.width, self.height)
+        return [(frame_cache.get(self.image, self.scale_factor, size, anchor="center", flip=flip,
+                                 alpha=self.get_alpha(ttl)), (x + offset[0], y + offset[1]))
+                for x, y, flip, ttl in zip(left.tolist(), top.tolist(), self.flip[:count][visible].tolist(),
+                                           self.ttl[:count][visible].tolist())]
+
+    def clear(self):
+        self.count = 0
+        self.image = None
+
+
+arrows = ProjectileManager('arrow')
@@ -0,0 +1,93 @@
+import pygame
+
+
+class RenderQueue:
+    def __init__(self):
+        self.layers = []
+        self.offset = (0, 0)
+        self.view = None
+        self.drawn = 0
+        self.culled = 0
+        self.dirty_rects = None
+
+    def begin(self, camera, view, track_dirty=False):
+        self.layers = []
+        self.dirty_rects = [] if track_dirty else None
+        self.offset = camera.offset
+        self.view = view
+        self.drawn = 0
+        self.culled = 0
+
+    def add_layer(self, blit_sequence):
+        self.layers.append(blit_sequence)
+        self.drawn += len(blit_sequence)
+
+    def add_blits(self, blit_sequence, total=None):
+        # готовый слой в экранных координатах, например от системы частиц
+        if total is not None:
+            self.culled += total - len(blit_sequence)
+        if self.dirty_rects is not None:
+            self.dirty_rects.extend(pygame.Rect(position, image.get_size()) for image, position in blit_sequence)
+        self.add_layer(blit_sequence)
+
+    def add_sprites(self, sprites, previous=None, alpha=1.0):
+        # экранные координаты считаются сразу для всего слоя из смещения камеры
+        offset_x, offset_y = self.offset
+        view = self.view
+        if previous is None or alpha >= 1:
+            layer = [(sprite.image, (sprite.rect.x + offset_x, sprite.rect.y + offset_y))
+                     for sprite in sprites if view.colliderect(sprite.rect)]
+        else:
+            layer = []
+            for sprite in sprites:
+                if not view.colliderect(sprite.rect):
+                    continue
+                x, y = sprite.rect.topleft
+                previous_x, previous_y = previous.get(sprite, (x, y))
+                layer.append((sprite.image, (round(previous_x + (x - previous_x) * alpha) + offset_x,
+                                             round(previous_y + (y - previous_y) * alpha) + offset_y)))
+        self.culled += len(sprites) - len(layer)
+        if self.dirty_rects is not None:
+            self.dirty_rects.extend(pygame.Rect(position, image.get_size()) for image, position in layer)
+        self.add_layer(layer)
+
+    def submit(self, screen):
+        for layer in self.layers:
+            if layer:
+                screen.blits(layer, doreturn=False)
+        self.layers = []
+
+
+class DisplayPresenter:
+    def __init__(self, dirty_rects=False):
+        self.dirty_rects = dirty_rects
+        self.full_redraw = True
+        self.rects = []
+        self.previous_rects = []
+        self.states = {}
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def mark(self, *rects):
+        if self.dirty_rects:
+            self.rects.extend(rects)
+
+    def mark_changed(self, key, rect, state):
+        # область обновляется только когда изменилось то, что в ней нарисовано
+        previous = self.states.get(key)
+        if previous is None or previous[1] != state:
+            if previous is not None:
+                self.mark(previous[0])
+            self.mark(rect)
+        self.states[key] = (rect.copy(), state)
+
+    def present(self):
+        if not self.dirty_rects or self.full_redraw:
+            pygame.display.flip()
+        elif self.rects or self.previous_rects:
+            # стираем прошлое положение спрайтов и показываем новое
+            pygame.display.update(self.previous_rects + self.rects)
+        self.previous_rects = self.rects
+        self.rects = []
+        self.full_redraw = False
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from controls import FrameInput
+
+REPLAY_VERSION = 1
+
+
+def state_hash(game):
+    # отпечаток состояния мира после прогона, по нему сверяются повторы
+    from hero import hero_group
+    from enemies import enemy_group
+
+    state = {
+        'frame': game.frame,
+        'level': game.current_level,
+        'money': game.money,
+        'score': game.score,
+        'attributes': [game.shop_menu.current_value_damage, game.shop_menu.current_value_armor,
+                       game.shop_menu.current_value_stamina],
+        'hero': [[tuple(hero.real_rect), hero.health, hero.endurance, hero.is_alive] for hero in hero_group],
+        'enemies': [[enemy.name, tuple(enemy.real_rect), enemy.health, enemy.is_alive] for enemy in enemy_group]
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()
+
+
+class InputRecorder:
+    def __init__(self, seed=None):
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.mode = None
+        self.save_state = None
+        self.frames = []
+        self.final_hash = None
+
+    def start(self, game, mode):
+        # запись начинается с первого запуска уровня, дальше только продолжается
+        if self.mode is not None:
+            return
+        self.mode = mode
+        # сохранение нужно и новой игре: после смерти героя уровень перезагружается из файла;
+        # None - файла нет или его не прочитать, при воспроизведении файла тоже не будет
+        try:
+            with open(game.save_path, 'r') as f:
+                self.save_state = json.load(f)
+        except (OSError, ValueError):
+            self.save_state = None
+        random.seed(self.seed)
+
+    def record(self, inputs):
+        self.frames.append([sorted(inputs.keys), [list(event) for event in inputs.events]])
+
+    def finish(self, game):
+        self.final_hash = state_hash(game)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                'version': REPLAY_VERSION,
+                'seed': self.seed,
+                'mode': self.mode,
+                'save_state': self.save_state,
+                'final_hash': self.final_hash,
+                'frames': self.frames
+            }, f)
+
+
+def load_inputs(frames):
+    inputs = []
+    for keys, events in frames:
+        inputs.append(FrameInput(keys, [(event[0], tuple(event[1])) if len(event) > 1 else (event[0],)
+                                        for event in events]))
+    return inputs
+
+
+def play(path):
+    with open(path, 'r') as f:
+        recording = json.load(f)
+    if recording['version'] != REPLAY_VERSION:
+        raise ValueError(f"unsupported replay version {recording['version']}")
+
+    import map
+
+    save_file, save_path = tempfile.mkstemp(suffix='.json')
+    os.close(save_file)
+    try:
+        game = map.Game(headless=True, save_path=save_path)
+        if recording['save_state'] is not None:
+            with open(save_path, 'w') as f:
+                json.dump(recording['save_state'], f)
+        else:
+            os.remove(save_path)
+        random.seed(recording['seed'])
+        if recording['mode'] == "continue":
+            game.prepare_level()
+        else:
+            game.new_game()
+
+        inputs = load_inputs(recording['frames'])
+        start = time.perf_counter()
+        game.simulate(len(inputs), inputs)
+        elapsed = time.perf_counter() - start
+    finally:
+        if os.path.exists(save_path):
+            os.remove(save_path)
+
+    final_hash = state_hash(game)
+    return {
+        'frames': len(inputs),
+        'seconds': elapsed,
+        'ticks_per_second': len(inputs) / elapsed if elapsed else 0,
+        'final_hash': final_hash,
+        'matches': recording['final_hash'] is None or final_hash == recording['final_hash']
+    }
+
+
+if __name__ == '__main__':
+    os.environ.setdefault("IRON_KNIGHT_HEADLESS", "1")
+    result = play(sys.argv[1])
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result['matches'] else 1)
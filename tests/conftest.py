@@ -0,0 +1,25 @@
+import os
+import sys
+
+os.environ.setdefault("IRON_KNIGHT_HEADLESS", "1")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+# модули игры лежат в корне репозитория и грузят ресурсы по относительным путям
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pytest
+
+
+@pytest.fixture
+def game(tmp_path, monkeypatch):
+    import map
+    from frames import frame_cache, FrameStore
+
+    # обработанные кадры пишутся во временную папку, а не в cache/ рабочей копии
+    monkeypatch.setattr(frame_cache, 'store', FrameStore(str(tmp_path / "frames")))
+    frame_cache.clear()
+    game = map.Game(headless=True, save_path=str(tmp_path / "save.json"))
+    yield game
+    game.new_game()
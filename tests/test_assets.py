@@ -0,0 +1,24 @@
+from assets import assets
+from controls import FrameInput
+from traps import trap_group, shop_group
+
+
+def load_level(game, path):
+    game.level_map = game.load_level(path)
+    game.hero = game.generate_level(game.level_map)
+
+
+def test_animated_objects_survive_level_reload(game, monkeypatch):
+    unloaded = []
+    unload = assets.unload
+    monkeypatch.setattr(assets, 'unload', lambda name: (unloaded.append(name), unload(name)))
+
+    load_level(game, "map/2.txt")
+    game.step(FrameInput())
+    load_level(game, "map/2.txt")
+
+    animated = {sprite.type for group in (trap_group, shop_group) for sprite in group if sprite.clock is not None}
+    assert {'fire', 'shop', 'portal'} <= animated
+    assert animated <= assets.level
+    assert not animated & set(unloaded)
+    assert all(name in assets.loaded for name in animated)
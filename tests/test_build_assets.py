@@ -0,0 +1,37 @@
+import pygame
+
+from assets import assets
+from build_assets import FRAME_SPECS
+from frames import frame_cache
+from particles import spark_emitter
+from projectiles import arrows
+
+
+def test_frame_specs_match_runtime_requests(game, monkeypatch):
+    # все обработанные кадры, которые игра запрашивает на уровнях, у искр и стрел
+    requests = []
+    get = frame_cache.get
+
+    def record(original_image, scale_factor, size, anchor="midbottom", crop=True, flip=False, alpha=255):
+        requests.append((original_image, (scale_factor, tuple(size), anchor, crop)))
+        return get(original_image, scale_factor, size, anchor, crop, flip, alpha)
+
+    monkeypatch.setattr(frame_cache, 'get', record)
+    monkeypatch.setattr(spark_emitter, 'frames', None)
+    arrows.clear()
+    names = {}
+    for level in (1, 2, 3):
+        game.level_map = game.load_level(f"map/{level}.txt")
+        game.hero = game.generate_level(game.level_map)
+        spark_emitter.get_frames()
+        arrows.spawn(0, 0, 1)
+        arrows.get_blits((0, 0), pygame.Rect(-100, -100, 200, 200))
+        arrows.clear()
+        names.update({id(image): name for name, frames in assets.loaded.items() for image in frames})
+
+    requested = {}
+    for image, spec in requests:
+        requested.setdefault(names[id(image)], set()).add(spec)
+    for name, specs in requested.items():
+        assert specs == set(FRAME_SPECS.get(name, ())), name
+    assert set(FRAME_SPECS) <= set(requested)
@@ -0,0 +1,48 @@
+import json
+
+import pygame
+
+import map
+from controls import FrameInput
+from replay import InputRecorder, play
+
+
+def record_death(save_path, replay_path):
+    # новая игра, в которой герой бежит направо до огненной ямы на первом уровне, а потом уровень
+    # перезагружается из сохранения
+    recorder = InputRecorder(seed=7)
+    game = map.Game(headless=True, save_path=save_path, recorder=recorder)
+    game.new_game()
+    died = False
+    for frame in range(900):
+        keys = [pygame.K_d]
+        if frame % 40 == 0:
+            keys.append(pygame.K_SPACE)
+        game.step(FrameInput(keys))
+        died = died or not game.hero.is_alive
+    recorder.finish(game)
+    recorder.save(replay_path)
+    return game, died
+
+
+def test_new_game_replay_with_death_matches(tmp_path):
+    save_path = str(tmp_path / "save.json")
+    with open(save_path, 'w') as f:
+        json.dump({'level': 1, 'money': 250, 'score': 250, 'damage': 2, 'health': 2, 'stamina': 1}, f)
+
+    game, died = record_death(save_path, str(tmp_path / "replay.json"))
+    assert died
+    # после смерти уровень загружен из сохранения вместе с его деньгами
+    assert game.hero.is_alive and game.money >= 250
+
+    result = play(str(tmp_path / "replay.json"))
+    assert result['matches']
+
+
+def test_new_game_replay_without_save_file_matches(tmp_path):
+    game, died = record_death(str(tmp_path / "missing.json"), str(tmp_path / "replay.json"))
+    assert died
+    with open(tmp_path / "replay.json", 'r') as f:
+        assert json.load(f)['save_state'] is None
+
+    assert play(str(tmp_path / "replay.json"))['matches']
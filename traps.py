@@ -1,32 +1,83 @@
 import random
 
 import pygame
-from groups import SpriteGroup
-from methods import load_image
-from damage_numbers import MoneyText
+from groups import SpriteGroup, entity_index
+from assets import AnimationSet
+from frames import frame_cache, scaled_size
+from damage_numbers import money_text_pool
 from interface import ShopMenu
 
 trap_group = SpriteGroup()
 shop_group = SpriteGroup()
 
-FIRE = [load_image(f"traps/fire/{x}.png") for x in range(1, 20)]
-ELECTRIC_FIELD = [load_image(f"traps/electric/{x}.png") for x in range(1, 10)]
-POISON_CLOUD = [load_image(f"traps/poison/{x}.png") for x in range(1, 20)]
+# у всех объектов общий набор анимаций, кадры грузятся при первом обращении
+object_images = AnimationSet({name: name for name in ('fire', 'electric_field', 'poison_cloud', 'shop', 'tree',
+                                                      'chest', 'tombstone', 'portal')})
 
-TREE = [load_image("decorations/tree/1.png")]
-TOMBSTONE = [load_image(f"decorations/tombstones/{x}.png") for x in range(1, 4)]
 
-SHOP = [load_image(f"decorations/shop/{x}.png") for x in range(1, 7)]
-CHEST = [load_image(f"decorations/chest/{x}.png") for x in range(1, 8)]
-PORTAL = [load_image(f"decorations/portal/{x}.png") for x in range(1, 7)]
+class AnimationClock:
+    # один счётчик кадров на тип объекта; кадр меняется с тем же запаздыванием, что и у Object.update_animation
+    def __init__(self, type, speed=2):
+        self.type = type
+        self.speed = speed
+        self.timer = 0
+        self.index = 0
+        self.shown = 0
+        # готовые кадры для каждого сочетания сдвига фазы, масштаба и размера
+        self.frames = {}
+
+    def update(self):
+        self.timer += self.speed
+        if self.timer >= 10:
+            self.timer = 0
+            self.index = (self.index + 1) % len(object_images[self.type])
+        elif self.shown != self.index:
+            self.shown = self.index
+            self.frames = {}
+
+    def get_frame(self, sprite):
+        key = (sprite.animation_phase, sprite.scale_factor, sprite.rect.size)
+        frame = self.frames.get(key)
+        if frame is None:
+            images = object_images[self.type]
+            frame = sprite.get_cropped_image(images[(self.shown + sprite.animation_phase) % len(images)])
+            self.frames[key] = frame
+        return frame
+
+
+class AnimationClocks:
+    # часы всех типов уровня продвигаются раз за тик, даже если сами объекты спят
+    def __init__(self):
+        self.clocks = {}
+
+    def get(self, type):
+        clock = self.clocks.get(type)
+        if clock is None:
+            clock = self.clocks[type] = AnimationClock(type)
+        return clock
+
+    def update(self):
+        for clock in self.clocks.values():
+            clock.update()
+
+    def clear(self):
+        self.clocks = {}
 
 
+animation_clocks = AnimationClocks()
+
 
 class Object(pygame.sprite.Sprite):
-    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group):
+    clock = None
+    # масштаб, размер исходного кадра и обрезка прозрачных краёв задаются классом: первый кадр сразу
+    # обрабатывается под итоговый прямоугольник, те же параметры берёт build_assets.py
+    scale_factor = 1.5
+    frame_size = (48, 70)
+    crop = False
+
+    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group, frame=0):
         super().__init__()
-        self.scale_factor = 1.5
-        self.rect = pygame.Rect(pos_x, 0, 48 * self.scale_factor, 70 * self.scale_factor)
+        self.rect = pygame.Rect((pos_x, 0), self.get_size())
         self.rect.bottom = pos_y + 64
 
         self.damage = 0
@@ -35,21 +86,13 @@ class Object(pygame.sprite.Sprite):
         self.enemies = enemy_group
 
         self.type = type
-        self.animation_index = 0
+        self.animation_index = frame
         self.animation_speed = 2
         self.animation_timer = 0
-        self.images = {
-            'fire': FIRE,
-            'electric_field': ELECTRIC_FIELD,
-            'poison_cloud': POISON_CLOUD,
-            'shop': SHOP,
-            'tree': TREE,
-            'chest': CHEST,
-            'tombstone': TOMBSTONE,
-            'portal': PORTAL,
-        }
-
-        self.image = self.get_cropped_image(self.images[self.type][self.animation_index])
+        self.images = object_images
+
+        if self.clock is None:
+            self.image = self.get_cropped_image(self.images[self.type][self.animation_index])
 
     def update(self):
         self.update_animation()
@@ -64,26 +107,16 @@ class Object(pygame.sprite.Sprite):
         else:
             self.image = self.get_cropped_image(self.images[self.type][self.animation_index])
 
-    def get_cropped_image(self, original_image):
-        scaled_width = int(original_image.get_rect().width * self.scale_factor)
-        scaled_height = int(original_image.get_rect().height * self.scale_factor)
-        scaled_image = pygame.transform.scale(original_image, (scaled_width, scaled_height))
+    @classmethod
+    def get_size(cls):
+        return scaled_size(cls.frame_size, cls.scale_factor)
 
-        centered_image = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-
-        x_pos = (self.rect.width - scaled_image.get_width()) // 2
-        y_pos = (self.rect.height - scaled_image.get_height())
-
-        centered_image.blit(scaled_image, (x_pos, y_pos))
-
-        return centered_image
+    def get_cropped_image(self, original_image):
+        return frame_cache.get(original_image, self.scale_factor, self.rect.size, crop=self.crop)
 
     def damage_entity(self):
-        entities = self.player.get_sprites() + self.enemies.get_sprites()
-        if entities:
-            for entity in entities:
-                if self.rect.colliderect(entity.real_rect):
-                    entity.take_hit(self.damage)
+        for entity in entity_index.query(self.rect):
+            entity.take_hit(self.damage)
 
     def draw(self, screen):
         border_color = (255, 0, 0)  
@@ -91,126 +124,119 @@ class Object(pygame.sprite.Sprite):
         pygame.draw.rect(screen, border_color, self.rect, border_thickness)
 
 
-class Fire(Object):
-    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group):
+class AnimatedObject(Object):
+    # бесконечная анимация без своего таймера: картинка - текущий кадр общих часов типа,
+    # phase сдвигает кадр, чтобы одинаковые объекты рядом не мигали в такт
+    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group, phase=0):
+        self.clock = animation_clocks.get(type)
+        self.animation_phase = phase
         super().__init__(pos_x, pos_y, type, hero_group, enemy_group)
+        # кадры берутся у менеджера ресурсов сразу: так анимация числится за строящимся уровнем
+        # и обрабатывается при загрузке, а не на первом тике
+        for image in self.images[self.type]:
+            self.get_cropped_image(image)
+
+    @property
+    def image(self):
+        return self.clock.get_frame(self)
+
+    def update(self):
+        pass
+
+
+class Fire(AnimatedObject):
+    scale_factor = 1.5
+    frame_size = (43, 64)
+
+    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group, phase=0):
+        super().__init__(pos_x, pos_y, type, hero_group, enemy_group, phase)
         self.add(trap_group)
-        self.scale_factor = 1.5
-        self.rect = pygame.Rect(pos_x, 0, 43 * self.scale_factor, 64 * self.scale_factor)
-        self.rect.bottom = pos_y + 64
         self.damage = 0.5
 
     def update(self):
-        self.update_animation()
         self.damage_entity()
 
 
-class ElectricField(Object):
-    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group):
-        super().__init__(pos_x, pos_y, type, hero_group, enemy_group)
+class ElectricField(AnimatedObject):
+    scale_factor = 2
+    frame_size = (64, 96)
+
+    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group, phase=0):
+        super().__init__(pos_x, pos_y, type, hero_group, enemy_group, phase)
         self.add(trap_group)
-        self.scale_factor = 2
-        self.rect = pygame.Rect(pos_x, 0, 64 * self.scale_factor, 96 * self.scale_factor)
-        self.rect.bottom = pos_y + 64
         self.damage = 1
 
     def update(self):
-        self.update_animation()
         self.damage_entity()
 
 
-class PoisonCloud(Object):
-    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group):
-        super().__init__(pos_x, pos_y, type, hero_group, enemy_group)
+class PoisonCloud(AnimatedObject):
+    scale_factor = 2
+    frame_size = (64, 96)
+
+    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group, phase=0):
+        super().__init__(pos_x, pos_y, type, hero_group, enemy_group, phase)
         self.add(trap_group)
-        self.scale_factor = 2
-        self.rect = pygame.Rect(pos_x, 0, 64 * self.scale_factor, 96 * self.scale_factor)
-        self.rect.bottom = pos_y + 64
         self.damage = 0.2
 
     def update(self):
-        self.update_animation()
         self.damage_entity()
 
 
-class Shop(Object):
-    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group):
-        super().__init__(pos_x, pos_y, type, hero_group, enemy_group)
+class Shop(AnimatedObject):
+    scale_factor = 2
+    frame_size = (120, 120)
+
+    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group, phase=0):
+        super().__init__(pos_x, pos_y, type, hero_group, enemy_group, phase)
         self.add(shop_group)
-        self.scale_factor = 2
-        self.rect = pygame.Rect(pos_x, 0, 120 * self.scale_factor, 120 * self.scale_factor)
-        self.rect.bottom = pos_y + 64
 
         self.font = pygame.font.Font(None, 48)
         self.color = (255, 255, 255)
         self.open_key = "E"
+        self.text_surface = self.font.render(self.open_key, True, self.color)
+        self.prompted = False
+        # кадры магазина с подсказкой, по одному на кадр анимации
+        self.prompt_frames = {}
+
+    @property
+    def image(self):
+        frame = self.clock.get_frame(self)
+        if not self.prompted:
+            return frame
+        prompt = self.prompt_frames.get(self.clock.shown)
+        if prompt is None:
+            prompt = frame.copy()
+            prompt.blit(self.text_surface, ((self.rect.width - 24) // 2, (self.rect.height - 72) // 2))
+            self.prompt_frames[self.clock.shown] = prompt
+        return prompt
 
     def check_for_player(self):
-        player = self.player.get_sprites()
-        if player:
-            for pl in player:
-                if self.rect.colliderect(pl.real_rect):
-                    return True
+        if entity_index.query(self.rect, self.player):
+            return True
 
     def update(self):
-        self.update_animation()
-        if self.check_for_player():
-            print("да")
-            text_surface = self.font.render(self.open_key, True, self.color)
-            self.image.blit(text_surface, ((self.rect.width - 24) // 2, (self.rect.height - 72) // 2))
+        self.prompted = bool(self.check_for_player())
 
 
 class Tree(Object):
+    scale_factor = 2
+    frame_size = (192, 192)
+    crop = True
+
     def __init__(self, pos_x, pos_y, type, hero_group, enemy_group):
         super().__init__(pos_x, pos_y, type, hero_group, enemy_group)
         self.add(trap_group)
-        self.scale_factor = 2
-        self.rect = pygame.Rect(pos_x, 0, 192 * self.scale_factor, 192 * self.scale_factor)
-        self.rect.bottom = pos_y + 64
-
-    def get_cropped_image(self, original_image):
-        non_transparent_rect = original_image.get_bounding_rect()
-        
-        crop_width = non_transparent_rect.width
-        crop_height = non_transparent_rect.height
-
-        
-        crop_rect = pygame.Rect(
-            non_transparent_rect.x + (non_transparent_rect.width // 2) - (crop_width // 2),
-            non_transparent_rect.y + (non_transparent_rect.height // 2) - (crop_height // 2),
-            crop_width,
-            crop_height
-        )
-
-        
-        cropped_image = pygame.Surface((crop_width, crop_height), pygame.SRCALPHA)
-
-        
-        cropped_image.blit(original_image, (0, 0), crop_rect)
-
-        
-        scaled_image = pygame.transform.scale(cropped_image,
-                                              (int(crop_width * self.scale_factor),
-                                               int(crop_height * self.scale_factor)))
-
-        centered_image = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-
-        x_pos = (self.rect.width - scaled_image.get_width()) // 2
-        y_pos = (self.rect.height - scaled_image.get_height())
-
-        centered_image.blit(scaled_image, (x_pos, y_pos))
-
-        return centered_image
 
 
 class Chest(Object):
+    scale_factor = 1.5
+    frame_size = (64, 64)
+    crop = True
+
     def __init__(self, pos_x, pos_y, type, hero_group, enemy_group, money_inside):
         super().__init__(pos_x, pos_y, type, hero_group, enemy_group)
         self.add(trap_group)
-        self.scale_factor = 1.5
-        self.rect = pygame.Rect(pos_x, 0, 64 * self.scale_factor, 64 * self.scale_factor)
-        self.rect.bottom = pos_y + 64
-        self.image = self.get_cropped_image(self.images[self.type][self.animation_index])
         self.opened = False
         self.opening = False
         self.send_money = False
@@ -220,49 +246,16 @@ class Chest(Object):
         self.money_inside = money_inside
         self.original_image = self.image.copy()
 
-    def get_cropped_image(self, original_image):
-        non_transparent_rect = original_image.get_bounding_rect()
-        
-        crop_width = non_transparent_rect.width
-        crop_height = non_transparent_rect.height
-
-        
-        crop_rect = pygame.Rect(
-            non_transparent_rect.x + (non_transparent_rect.width // 2) - (crop_width // 2),
-            non_transparent_rect.y + (non_transparent_rect.height // 2) - (crop_height // 2),
-            crop_width,
-            crop_height
-        )
-
-        
-        cropped_image = pygame.Surface((crop_width, crop_height), pygame.SRCALPHA)
-
-        
-        cropped_image.blit(original_image, (0, 0), crop_rect)
-
-        
-        scaled_image = pygame.transform.scale(cropped_image,
-                                              (int(crop_width * self.scale_factor),
-                                               int(crop_height * self.scale_factor)))
-
-        centered_image = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-
-        x_pos = (self.rect.width - scaled_image.get_width()) // 2
-        y_pos = (self.rect.height - scaled_image.get_height())
-
-        centered_image.blit(scaled_image, (x_pos, y_pos))
-
-        return centered_image
-
     def update(self):
         if self.check_for_player() and not self.opened and not self.opening:
             print("да")
             text_surface = self.font.render(self.open_key, True, self.color)
+            self.image = self.original_image.copy()
             self.image.blit(text_surface, ((self.rect.width - 24) // 2, (self.rect.height - 72) // 2))
             self.open()
             self.send_money = True
         elif not self.opened and not self.opening:
-            self.image = self.original_image.copy()
+            self.image = self.original_image
         if self.opening:
             print("вызвал")
             self.update_animation()
@@ -274,7 +267,7 @@ class Chest(Object):
         if not self.opened and not self.opening:
             if self.check_for_player():
                 self.opening = True
-                MoneyText(self.rect.x + self.rect.width // 2, self.rect.y, self.money_inside)
+                money_text_pool.spawn(self.rect.x + self.rect.width // 2, self.rect.y, self.money_inside)
 
     def get_money(self):
         if self.opened and self.send_money:
@@ -283,43 +276,30 @@ class Chest(Object):
         return False
 
     def check_for_player(self):
-        player = self.player.get_sprites()
-        if player:
-            for pl in player:
-                if self.rect.colliderect(pl.real_rect):
-                    return True
+        if entity_index.query(self.rect, self.player):
+            return True
 
 class Tombstone(Object):
+    scale_factor = 2
+    frame_size = (32, 48)
+
     def __init__(self, pos_x, pos_y, type, hero_group, enemy_group):
-        super().__init__(pos_x, pos_y, type, hero_group, enemy_group)
+        super().__init__(pos_x, pos_y, type, hero_group, enemy_group, random.randint(0, 2))
         self.add(trap_group)
-        self.scale_factor = 2
-        self.rect = pygame.Rect(pos_x, 0, 32 * self.scale_factor, 48 * self.scale_factor)
-        self.rect.bottom = pos_y + 64
-        self.image = self.get_cropped_image(self.images[self.type][random.randint(0, 2)])
 
     def update(self):
         pass
 
-class Portal(Object):
-    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group):
-        super().__init__(pos_x, pos_y, type, hero_group, enemy_group)
+class Portal(AnimatedObject):
+    scale_factor = 4
+    frame_size = (24, 32)
+
+    def __init__(self, pos_x, pos_y, type, hero_group, enemy_group, phase=0):
+        super().__init__(pos_x, pos_y, type, hero_group, enemy_group, phase)
         self.add(trap_group)
-        self.scale_factor = 4
-        self.rect = pygame.Rect(pos_x, 0, 24 * self.scale_factor, 32 * self.scale_factor)
-        self.rect.bottom = pos_y + 64
         self.damage = 0.2
 
     def teleport(self):
-        entities = self.player.get_sprites()
-        if entities:
-            entity = entities[0]
-            if self.rect.colliderect(entity.real_rect):
-                return True
-            return False
+        if entity_index.query(self.rect, self.player):
+            return True
         return False
-
-
-
-    def update(self):
-        self.update_animation()